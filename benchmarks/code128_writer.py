@@ -0,0 +1,61 @@
+# ============================================================
+# Benchmark — Code128 rendering: PNG round-trip vs RasterWriter
+# ============================================================
+# python benchmarks/code128_writer.py [--n 2000]
+#
+# "png" is the previous generate_code128: python-barcode's ImageWriter
+# paints every module, encodes a PNG into a BytesIO and Image.open
+# decodes it again. "raster" is the current generate_code128.
+
+import io
+import os
+import sys
+import time
+import random
+import string
+import argparse
+
+import barcode
+from barcode.writer import ImageWriter
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from label_generator.symbols import generate_code128  # noqa: E402
+
+def png_round_trip(data, writer_options=None, mode="RGB"):
+    CODE128 = barcode.get_barcode_class("code128")
+    c128 = CODE128(data, writer=ImageWriter(mode=mode))
+    buffer = io.BytesIO()
+    c128.write(buffer, options=writer_options)
+    buffer.seek(0)
+    img = Image.open(buffer)
+    img.load()
+    return img
+
+def bench(fn, codes, mode):
+    t0 = time.perf_counter()
+    for code in codes:
+        fn(code, mode=mode)
+    return (time.perf_counter() - t0) / len(codes)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Code128 PNG round-trip vs RasterWriter")
+    parser.add_argument("--n", type=int, default=2000, help="barcodes per run")
+    parser.add_argument("--length", type=int, default=12, help="characters per code")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(0)
+    alphabet = string.ascii_uppercase + string.digits + "-"
+    codes = ["".join(rng.choices(alphabet, k=args.length)) for _ in range(args.n)]
+
+    print(f"{args.n} Code128 symbols, {args.length} chars, 300 dpi")
+    print(f"{'mode':<6}{'png ms':>10}{'raster ms':>12}{'speedup':>10}")
+    for mode in ["RGB", "L", "1"]:
+        png_round_trip(codes[0], mode=mode)
+        generate_code128(codes[0], mode=mode)
+        old = bench(png_round_trip, codes, mode)
+        new = bench(generate_code128, codes, mode)
+        print(f"{mode:<6}{old * 1000:>10.3f}{new * 1000:>12.3f}{old / new:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+# ============================================================
+# Benchmark suite — every rendering stage
+# ============================================================
+# python benchmarks/suite.py                      all scenarios
+# python benchmarks/suite.py --quick              fewer, shorter runs
+# python benchmarks/suite.py --stage generate_pdf --out pdf.json
+# python benchmarks/suite.py --compare baseline.json
+#
+# Each scenario is one stage with one set of parameters. It is run until
+# --min-time has passed (at least --min-ops times) and reports ops/s and
+# p50/p99 latency; peak memory comes from one extra run under tracemalloc.
+# Results are written as JSON for comparing releases.
+
+import io
+import os
+import sys
+import json
+import time
+import random
+import string
+import argparse
+import platform
+import subprocess
+import tracemalloc
+from importlib.metadata import version, PackageNotFoundError
+
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from label_generator import (  # noqa: E402
+    LABEL_PRESETS,
+    PAPER_PRESETS,
+    generate_qr,
+    generate_code128,
+    load_font,
+    wrap_text_to_width,
+    compose_label_image_wrapped,
+    render_label,
+    generate_pdf,
+    generate_pdf_batch,
+    generate_pdf_preview,
+    page_grid,
+)
+import label_generator.text as text_module  # noqa: E402
+import label_generator.preview as preview_module  # noqa: E402
+
+SIDES = ["top", "bottom", "left", "right"]
+MARGINS = dict.fromkeys(SIDES, 1.0)
+PADDING = dict.fromkeys(SIDES, 1.0)
+WORDS = "barang sabun teh botol kemasan rak gudang karton besar kecil ukuran nomor lot".split()
+
+# ============================================================
+# SCENARIOS
+# ============================================================
+class Scenario:
+    def __init__(self, stage, params, run):
+        self.stage = stage
+        self.params = params
+        self.run = run
+
+    @property
+    def name(self):
+        return ",".join(f"{k}={v}" for k, v in self.params.items())
+
+def _code(rng, length):
+    return "".join(rng.choices(string.ascii_uppercase + string.digits, k=length))
+
+def _text(rng, words):
+    return " ".join(rng.choices(WORDS, k=words))
+
+def _size_name(presets, size):
+    return next(name for name, s in presets.items() if s == size)
+
+def scenarios(quick=False):
+    rng = random.Random(0)
+    pick = (lambda values: values[:1] + values[-1:]) if quick else (lambda values: values)
+
+    for n in pick([8, 64, 256]):
+        data = _code(rng, n)
+        yield Scenario("generate_qr", {"data_len": n}, lambda data=data: generate_qr(data))
+
+    for n in pick([8, 24, 48]):
+        data = _code(rng, n)
+        yield Scenario("generate_code128", {"data_len": n}, lambda data=data: generate_code128(data))
+
+    # Cold: with the word-width cache warm, wrapping would time dict lookups
+    draw = ImageDraw.Draw(Image.new("RGB", (1, 1), "white"))
+    for words in pick([10, 50, 200]):
+        for size in pick([10, 14, 24]):
+            text, font = _text(rng, words), load_font(size)
+
+            def wrap(text=text, font=font):
+                text_module._advances.clear()
+                wrap_text_to_width(draw, font, text, 400)
+            yield Scenario("wrap_text_to_width", {"words": words, "font_size": size, "width_px": 400}, wrap)
+
+    for symbology in ["Code128", "QR"]:
+        symbol = render_label("ABC-12345", "", symbology)
+        for size in pick([14, 24]):
+            for words in pick([10, 40]):
+                text = _text(rng, words)
+
+                def compose(symbol=symbol, text=text, size=size):
+                    text_module._advances.clear()
+                    compose_label_image_wrapped(symbol, text, font_size=size)
+                yield Scenario(
+                    "compose_label_image_wrapped", {"symbology": symbology, "font_size": size, "words": words}, compose
+                )
+
+    label_img = render_label("ABC-12345", _text(rng, 6), "Code128")
+    labels = pick([LABEL_PRESETS["38×100 mm"], LABEL_PRESETS["13×38 mm"], LABEL_PRESETS["8×20 mm"]])
+    papers = pick([PAPER_PRESETS["A4"], PAPER_PRESETS["A3"]])
+    for label_mm in labels:
+        for paper_mm in papers:
+            cells = page_grid(label_mm, paper_mm, MARGINS, 1.0, PADDING).per_page
+            params = {
+                "label": _size_name(LABEL_PRESETS, label_mm),
+                "paper": _size_name(PAPER_PRESETS, paper_mm),
+                "cells": cells,
+            }
+            yield Scenario(
+                "generate_pdf", params,
+                lambda label_mm=label_mm, paper_mm=paper_mm: generate_pdf(
+                    label_img, label_mm, paper_mm, MARGINS, 1.0, PADDING, out=io.BytesIO()
+                )
+            )
+
+            def preview(label_mm=label_mm, paper_mm=paper_mm):
+                # Cold: the preview's own result cache would turn this into a lookup
+                preview_module._preview_cache.clear()
+                generate_pdf_preview(label_img, label_mm, paper_mm, MARGINS, 1.0, PADDING)
+            yield Scenario("generate_pdf_preview", params, preview)
+
+    distinct = [render_label(_code(rng, 10), _text(rng, 4), "Code128") for _ in range(20)]
+    for batch in pick([100, 1000, 5000]):
+        imgs = [distinct[i % len(distinct)] for i in range(batch)]
+        yield Scenario(
+            "generate_pdf_batch", {"labels": batch, "distinct": len(distinct), "label": "38×100 mm", "paper": "A4"},
+            lambda imgs=imgs: generate_pdf_batch(
+                imgs, LABEL_PRESETS["38×100 mm"], PAPER_PRESETS["A4"], MARGINS, 1.0, PADDING, out=io.BytesIO()
+            )
+        )
+
+# ============================================================
+# MEASUREMENT
+# ============================================================
+def _percentile(sorted_values, q):
+    i = min(len(sorted_values) - 1, max(0, round(q * (len(sorted_values) - 1))))
+    return sorted_values[i]
+
+def measure(scenario, min_time=1.0, min_ops=5, warmup=1):
+    for _ in range(warmup):
+        scenario.run()
+
+    times = []
+    start = time.perf_counter()
+    while len(times) < min_ops or time.perf_counter() - start < min_time:
+        t0 = time.perf_counter()
+        scenario.run()
+        times.append(time.perf_counter() - t0)
+    times.sort()
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    scenario.run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "stage": scenario.stage,
+        "scenario": scenario.name,
+        "params": scenario.params,
+        "ops": len(times),
+        "ops_per_s": len(times) / sum(times),
+        "p50_ms": _percentile(times, 0.50) * 1000,
+        "p99_ms": _percentile(times, 0.99) * 1000,
+        "peak_kib": peak / 1024,
+    }
+
+def environment():
+    def pkg(name):
+        try:
+            return version(name)
+        except PackageNotFoundError:
+            return None
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "packages": {n: pkg(n) for n in ["pillow", "reportlab", "qrcode", "python-barcode", "numpy"]},
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+# ============================================================
+# REPORTING
+# ============================================================
+COLUMNS = f"{'stage':<28} {'scenario':<46} {'ops/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'peak KiB':>10}"
+
+def format_row(r, baseline=None):
+    line = (
+        f"{r['stage']:<28} {r['scenario']:<46} {r['ops_per_s']:>10.1f} "
+        f"{r['p50_ms']:>9.3f} {r['p99_ms']:>9.3f} {r['peak_kib']:>10.0f}"
+    )
+    old = (baseline or {}).get((r["stage"], r["scenario"]))
+    if old:
+        line += f"  {r['ops_per_s'] / old['ops_per_s']:>6.2f}x"
+    return line
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Label Generator benchmark suite")
+    parser.add_argument("--quick", action="store_true", help="fewer scenarios and shorter runs")
+    parser.add_argument("--stage", action="append", help="only these stages (repeatable)")
+    parser.add_argument("--min-time", type=float, default=None, help="seconds per scenario (default 1, quick 0.2)")
+    parser.add_argument("--min-ops", type=int, default=5, help="at least this many timed runs")
+    parser.add_argument("--out", default="benchmark-results.json", help="JSON results file")
+    parser.add_argument("--compare", help="earlier results file to compare ops/s against")
+    args = parser.parse_args(argv)
+    min_time = args.min_time if args.min_time is not None else (0.2 if args.quick else 1.0)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = {(r["stage"], r["scenario"]): r for r in json.load(f)["results"]}
+
+    print(COLUMNS + ("  vs base" if baseline else ""))
+    results = []
+    for scenario in scenarios(args.quick):
+        if args.stage and scenario.stage not in args.stage:
+            continue
+        results.append(measure(scenario, min_time, args.min_ops))
+        print(format_row(results[-1], baseline), flush=True)
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2, ensure_ascii=False)
+    print(f"{len(results)} scenarios -> {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# ============================================================
+# Label Generator — headless rendering library
+# ============================================================
+# Importing this package never imports Streamlit, so batch workers, the
+# command line and tests can use it directly. The Streamlit app lives in
+# main.py.
+
+from . import tracing
+from .presets import PX_PER_MM, LABEL_PRESETS, PAPER_PRESETS, lookup_size_mm
+from .text import (
+    FONT_PATH,
+    WORD_BREAKS,
+    load_font,
+    load_pdf_font,
+    font_cache_info,
+    safe_text_height,
+    safe_text_width,
+    text_advance,
+    break_word,
+    wrap_text_with_widths,
+    wrap_text_to_width,
+)
+from .symbols import (
+    SYMBOLOGIES,
+    ENCODE_ERRORS,
+    check_symbol_data,
+    SymbolCache,
+    symbol_cache,
+    rasterize_modules,
+    generate_qr,
+    generate_code128,
+    generate_symbol,
+    code128_modules,
+    qr_matrix,
+)
+from .compose import (
+    COLOR_MODES,
+    MONO_THRESHOLD,
+    pil_to_bytes,
+    to_mono,
+    fit_description_font,
+    compose_label_image_wrapped,
+    render_label,
+    layout_label_vector,
+    compute_label_mm_from_composed,
+)
+from .batch import (
+    BATCH_COLUMNS,
+    read_batch_table,
+    parse_batch_rows,
+    iter_batch_labels,
+    plan_sized_labels,
+    iter_owned_labels,
+    render_labels_parallel,
+)
+from .layout import GridLayout, page_grid, cell_inner_mm
+from .packing import pack_labels
+from .pdf import (
+    compute_page_grid_pt,
+    generate_pdf,
+    generate_pdf_batch,
+    generate_pdf_vector,
+    generate_pdf_packed,
+    pdf_xobject_counts,
+    image_digest,
+    EncodedLabel,
+    encode_label_image,
+)
+from .preview import generate_pdf_preview
+from .printers import (
+    PRINTER_DPIS,
+    PRINTER_LANGUAGES,
+    PrinterLanguage,
+    printer_geometry,
+    render_printer_label,
+    render_printer_batch,
+    render_geometry_bitmap,
+    render_label_bitmap,
+)
@@ -0,0 +1,238 @@
+# ============================================================
+# Label Generator — batch input & parallel rendering
+# ============================================================
+
+import io
+import os
+import csv
+import zipfile
+import collections
+from concurrent.futures import ProcessPoolExecutor
+
+from . import tracing
+from .presets import LABEL_PRESETS, lookup_size_mm
+from .symbols import SYMBOLOGIES, ENCODE_ERRORS, check_symbol_data
+from .compose import render_label, MONO_THRESHOLD
+from .printers import render_label_bitmap
+from .pdf import encode_label_image
+
+# ============================================================
+# BATCH INPUT
+# ============================================================
+BATCH_COLUMNS = {
+    "code": ("code", "kode"),
+    "description": ("description", "deskripsi", "desc"),
+    "symbology": ("symbology", "barcode", "jenis", "type"),
+    "quantity": ("quantity", "qty", "jumlah"),
+    # Optional per-row label size (preset or WxH mm) for mixed-size sheets
+    "label": ("label", "ukuran", "size"),
+}
+
+def read_batch_table(data: bytes, filename: str):
+    # Returns (header, row iterator) from a CSV or XLSX upload
+    if filename.lower().endswith((".xlsx", ".xlsm")):
+        try:
+            import openpyxl
+        except ImportError:
+            raise RuntimeError("Membaca XLSX membutuhkan paket openpyxl")
+        from openpyxl.utils.exceptions import InvalidFileException
+        try:
+            wb = openpyxl.load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+        except (zipfile.BadZipFile, InvalidFileException, KeyError) as e:
+            # Not a zip, or a zip without a workbook in it
+            raise ValueError(f"File XLSX tidak valid: {e}")
+        rows = wb.active.iter_rows(values_only=True)
+    else:
+        text = data.decode("utf-8-sig")
+        try:
+            dialect = csv.Sniffer().sniff(text[:4096], delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        rows = csv.reader(io.StringIO(text), dialect)
+
+    header = next(rows, None) or []
+    header = [str(h or "").strip().lower() for h in header]
+    return header, rows
+
+def parse_batch_rows(header, rows, default_symbology="Code128"):
+    idx = {}
+    for key, names in BATCH_COLUMNS.items():
+        idx[key] = next((header.index(n) for n in names if n in header), None)
+    if idx["code"] is None:
+        return [], [(1, "Kolom 'code' tidak ditemukan")]
+
+    symbologies = {s.lower(): s for s in SYMBOLOGIES}
+
+    def cell(row, key):
+        i = idx[key]
+        if i is None or i >= len(row) or row[i] is None:
+            return ""
+        return str(row[i]).strip()
+
+    items, errors = [], []
+    for line, row in enumerate(rows, start=2):
+        if not any(str(v or "").strip() for v in row):
+            continue
+        code = cell(row, "code")
+        if not code:
+            errors.append((line, "Kode kosong"))
+            continue
+
+        sym = cell(row, "symbology") or default_symbology
+        if sym.lower() not in symbologies:
+            errors.append((line, f"Jenis barcode tidak dikenal: {sym}"))
+            continue
+        sym = symbologies[sym.lower()]
+        try:
+            check_symbol_data(sym, code)
+        except ENCODE_ERRORS as e:
+            errors.append((line, f"Kode tidak bisa dibuat {sym}: {e}"))
+            continue
+
+        qty = cell(row, "quantity") or "1"
+        try:
+            qty = int(float(qty))
+        except ValueError:
+            errors.append((line, f"Quantity tidak valid: {qty}"))
+            continue
+        if qty < 1:
+            errors.append((line, f"Quantity harus >= 1: {qty}"))
+            continue
+
+        size = cell(row, "label")
+        try:
+            label_mm = lookup_size_mm(size, LABEL_PRESETS) if size else None
+        except ValueError:
+            errors.append((line, f"Ukuran label tidak valid: {size}"))
+            continue
+
+        items.append({
+            "line": line,
+            "code": code,
+            "description": cell(row, "description"),
+            "symbology": sym,
+            "quantity": qty,
+            "label_mm": label_mm,
+        })
+    return items, errors
+
+def iter_batch_labels(items, workers=1, chunk_size=64, spacing_px=5, font_size=14, position="Bottom", mode="RGB", threshold=MONO_THRESHOLD, dpi=None, label_mm=None, padding_mm=None, word_break="char", fit_mm=None, encode=False):
+    # Each distinct row is composed once and repeated `quantity` times.
+    # With dpi and label_mm, labels are bitmaps at the printer's resolution
+    # (render_label_bitmap) to be placed in their cells without padding.
+    # fit_mm (the cell inside its padding) shrinks each description's font
+    # to fit; bitmaps fit their own label_mm and padding_mm instead.
+    # encode: yield EncodedLabel for the PDF writers instead of images
+    if dpi:
+        cell_kwargs = {"dpi": dpi, "label_mm": label_mm, "padding_mm": padding_mm, "fit_font": fit_mm is not None}
+    else:
+        cell_kwargs = {"fit_mm": fit_mm}
+    imgs = render_labels_parallel(
+        items,
+        workers=workers,
+        chunk_size=chunk_size,
+        encode=encode,
+        spacing_px=spacing_px,
+        font_size=font_size,
+        position=position,
+        mode=mode,
+        threshold=threshold,
+        word_break=word_break,
+        **cell_kwargs
+    )
+    for item, img in zip(items, imgs):
+        for _ in range(item["quantity"]):
+            yield img
+
+def plan_sized_labels(items, label_mm=None, fit=None, label_orientation="Portrait", workers=1, chunk_size=64, **compose_kwargs):
+    # (owners, sizes) for generate_pdf_packed, one entry per printed label:
+    # the index of its item and its cell size in mm. The size is the row's
+    # own "label" column, else label_mm, else fit(image) (auto-fit to the
+    # composed label). Only auto-fit rows are rendered here, and only their
+    # size is kept.
+    item_sizes = [it.get("label_mm") or label_mm for it in items]
+    unsized = [i for i, size in enumerate(item_sizes) if size is None]
+    imgs = render_labels_parallel([items[i] for i in unsized], workers=workers, chunk_size=chunk_size, **compose_kwargs)
+    for i, img in zip(unsized, imgs):
+        item_sizes[i] = fit(img)
+
+    owners, sizes = [], []
+    for i, (item, (w, h)) in enumerate(zip(items, item_sizes)):
+        if label_orientation == "Landscape": w, h = h, w
+        owners += [i] * item["quantity"]
+        sizes += [(w, h)] * item["quantity"]
+    return owners, sizes
+
+def iter_owned_labels(items, owners, workers=1, chunk_size=64, encode=False, **compose_kwargs):
+    # One label image per entry of owners (item indices), in that order.
+    # A run of labels of the same item is rendered once, so with packed
+    # pages an item is only rendered again where its labels continue on
+    # another page, and only the labels in flight are alive.
+    runs = []
+    for i in owners:
+        if runs and runs[-1][0] == i:
+            runs[-1][1] += 1
+        else:
+            runs.append([i, 1])
+    imgs = render_labels_parallel([items[i] for i, _ in runs], workers=workers, chunk_size=chunk_size, encode=encode, **compose_kwargs)
+    for (_, count), img in zip(runs, imgs):
+        for _ in range(count):
+            yield img
+
+# ============================================================
+# PARALLEL RENDERING
+# ============================================================
+def _render_items(items, compose_kwargs, encode=False):
+    render = render_label_bitmap if compose_kwargs.get("dpi") else render_label
+    imgs = []
+    for it in items:
+        # Spans of this label carry its input line
+        with tracing.context(line=it.get("line")):
+            img = render(it["code"], it["description"], symbology=it["symbology"], **compose_kwargs)
+            imgs.append(encode_label_image(img) if encode else img)
+    return imgs
+
+def _init_worker():
+    # A forked worker inherits the parent's hooks (a trace file exporter
+    # among them); its records go back through _render_label_chunk instead
+    tracing._hooks.clear()
+
+def _render_label_chunk(args):
+    # Runs in a worker process. Its spans can't reach the parent's hooks,
+    # so when tracing they are recorded and sent back with the labels.
+    items, compose_kwargs, encode, trace = args
+    if not trace:
+        return _render_items(items, compose_kwargs, encode), []
+    with tracing.recording() as records:
+        imgs = _render_items(items, compose_kwargs, encode)
+    return imgs, records
+
+def render_labels_parallel(items, workers=None, chunk_size=64, encode=False, **compose_kwargs):
+    # Yields one composed label per item, in input order. With encode, each
+    # is an EncodedLabel: the image stream is compressed in the workers too,
+    # so the process writing the PDF only copies bytes.
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(items) <= chunk_size:
+        yield from (_render_items([it], compose_kwargs, encode)[0] for it in items)
+        return
+
+    chunks = (
+        (items[i:i + chunk_size], compose_kwargs, encode, tracing.enabled())
+        for i in range(0, len(items), chunk_size)
+    )
+
+    # Only a few chunks per worker are in flight, so finished labels never
+    # pile up faster than the PDF writer consumes them
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        pending = collections.deque()
+        for chunk in chunks:
+            pending.append(pool.submit(_render_label_chunk, chunk))
+            if len(pending) >= workers * 2:
+                yield from _chunk_result(pending.popleft())
+        while pending:
+            yield from _chunk_result(pending.popleft())
+
+def _chunk_result(future):
+    imgs, records = future.result()
+    tracing.replay(records)
+    return imgs
@@ -0,0 +1,252 @@
+# ============================================================
+# Label Generator — command line
+# ============================================================
+# python -m label_generator render --input items.csv --paper A4 \
+#     --label 38x100 --out out.pdf --workers 8
+# python -m label_generator render --input items.csv --label 50x30 \
+#     --format zpl|tspl|epl --dpi 203 --out out.zpl
+# python -m label_generator render --input items.csv --label 50x30 \
+#     --mode mono --threshold 128 --exact-dpi --dpi 203 --out thermal.pdf
+# python -m label_generator render --input mixed.csv --pack --out mixed.pdf
+#     (rows carry their own size in a "label" column)
+# python -m label_generator render --input items.csv --out out.pdf \
+#     --trace trace.jsonl    (per-stage timings, summary on stderr)
+# python -m label_generator render --input items.csv --label 50x30 \
+#     --fit-font --font-size 36 --out out.pdf
+#
+# Exit codes: 0 all rows rendered, 1 some rows were invalid (the valid
+# ones are still rendered unless --strict), 2 bad arguments or input.
+
+import os
+import sys
+import time
+import argparse
+
+from . import tracing
+from .presets import LABEL_PRESETS, PAPER_PRESETS, lookup_size_mm
+from .symbols import SYMBOLOGIES
+from .compose import render_label, compute_label_mm_from_composed, MONO_THRESHOLD
+from .text import WORD_BREAKS
+from .layout import cell_inner_mm
+from .batch import read_batch_table, parse_batch_rows, iter_batch_labels, plan_sized_labels, iter_owned_labels
+from .pdf import generate_pdf_batch, generate_pdf_vector, generate_pdf_packed
+from .printers import PRINTER_DPIS, PRINTER_LANGUAGES, render_printer_batch
+
+EXIT_OK = 0
+EXIT_BAD_ROWS = 1
+EXIT_USAGE = 2
+
+SIDES = ["top", "bottom", "left", "right"]
+RASTER_MODES = {"rgb": "RGB", "gray": "L", "mono": "1"}
+
+def parse_sides(value):
+    # "1" -> all sides, "1,2,3,4" -> top,bottom,left,right (sidebar order)
+    parts = [float(v) for v in value.split(",")]
+    if len(parts) == 1:
+        parts *= 4
+    if len(parts) != 4:
+        raise argparse.ArgumentTypeError("expected 1 or 4 comma-separated values in mm")
+    return dict(zip(SIDES, parts))
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="label-gen", description="Label Generator batch rendering")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    render = sub.add_parser("render", help="render a CSV/XLSX table into one PDF")
+    render.add_argument("--input", required=True, help="CSV or XLSX with code, description, symbology, quantity")
+    render.add_argument("--out", required=True, help="output path")
+    render.add_argument(
+        "--format", choices=["pdf"] + [n.lower() for n in PRINTER_LANGUAGES], default="pdf",
+        help="PDF sheet or native printer commands (ZPL II, TSPL, EPL2)"
+    )
+    render.add_argument("--dpi", type=int, choices=PRINTER_DPIS, default=203, help="printer resolution")
+    render.add_argument(
+        "--exact-dpi", action="store_true",
+        help="PDF: render each label once at --dpi, with whole-dot modules and no resampling"
+    )
+    render.add_argument("--gap", type=float, default=2.0, help="gap between labels on the roll in mm (TSPL/EPL)")
+    render.add_argument("--paper", default="A4", help="paper preset or WxH in mm (default A4)")
+    render.add_argument("--label", default="auto", help="label preset, WxH in mm, or 'auto' (default)")
+    render.add_argument("--orientation", choices=["Portrait", "Landscape"], default="Portrait", help="label orientation")
+    render.add_argument("--landscape", action="store_true", help="landscape page")
+    render.add_argument("--margin", type=parse_sides, default=parse_sides("1"), help="page margin mm: one value or top,bottom,left,right")
+    render.add_argument("--padding", type=parse_sides, default=parse_sides("1"), help="label padding mm: one value or top,bottom,left,right")
+    render.add_argument("--spacing", type=float, default=1.0, help="spacing between labels in mm")
+    render.add_argument("--symbology", choices=SYMBOLOGIES, default="Code128", help="default for rows without one")
+    render.add_argument("--position", choices=["Bottom", "Right"], default="Bottom", help="description position")
+    render.add_argument("--font-size", type=int, default=14, help="description font size")
+    render.add_argument(
+        "--fit-font", action="store_true",
+        help="shrink each description's font (up to --font-size) to fit the label without shrinking the barcode"
+    )
+    render.add_argument("--desc-spacing", type=int, default=5, help="barcode to description spacing in px")
+    render.add_argument(
+        "--word-break", choices=WORD_BREAKS, default="char",
+        help="words wider than a line: overflow, break, break with '-', or cut with '...'"
+    )
+    render.add_argument(
+        "--mode", choices=["rgb", "gray", "mono"], default="rgb",
+        help="raster labels in RGB, 8-bit gray, or 1-bit for thermal printing"
+    )
+    render.add_argument("--threshold", type=int, default=MONO_THRESHOLD, help="gray level (0-255) at or above which --mode mono is white")
+    render.add_argument("--vector", action="store_true", help="draw barcodes and text as PDF vectors")
+    render.add_argument(
+        "--pack", action="store_true",
+        help="mixed label sizes: pack each row's own 'label' size (else --label) onto as few pages as possible"
+    )
+    render.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="rendering processes")
+    render.add_argument("--chunk-size", type=int, default=64, help="labels per worker task")
+    render.add_argument("--strict", action="store_true", help="render nothing if any row is invalid")
+    render.add_argument("--quiet", action="store_true", help="no progress output")
+    render.add_argument("--trace", metavar="PATH", help="write per-stage timings as JSON lines and print a summary")
+
+    sub.add_parser("presets", help="list label and paper presets")
+    return parser
+
+def _progress(labels, total, quiet, every=500):
+    t0 = time.perf_counter()
+    for i, label in enumerate(labels, start=1):
+        if not quiet and (i % every == 0 or i == total):
+            elapsed = time.perf_counter() - t0
+            print(
+                f"\r{i}/{total} labels  {i / max(elapsed, 1e-9):.0f} labels/s",
+                end="", file=sys.stderr, flush=True
+            )
+        yield label
+    if not quiet:
+        print(file=sys.stderr)
+
+def cmd_presets(args):
+    print("Labels:")
+    for name, (w, h) in LABEL_PRESETS.items():
+        print(f"  {name:<20} {w} x {h} mm")
+    print("Paper:")
+    for name, (w, h) in PAPER_PRESETS.items():
+        print(f"  {name:<20} {w} x {h} mm")
+    return EXIT_OK
+
+def cmd_render(args):
+    if not args.trace:
+        return _render(args)
+
+    exporter = tracing.JsonLinesExporter(args.trace)
+    with tracing.recording() as records:
+        tracing.add_hook(exporter)
+        try:
+            return _render(args)
+        finally:
+            tracing.remove_hook(exporter)
+            exporter.close()
+            if not args.quiet:
+                _print_trace_summary(records)
+
+def _print_trace_summary(records):
+    print(f"{'stage':<18}{'count':>8}{'total ms':>12}{'mean ms':>10}{'max ms':>10}{'KiB':>10}", file=sys.stderr)
+    for name, s in tracing.summarize(records).items():
+        print(
+            f"{name:<18}{s['count']:>8}{s['total_ms']:>12.1f}{s['mean_ms']:>10.3f}"
+            f"{s['max_ms']:>10.3f}{s['bytes'] / 1024:>10.0f}",
+            file=sys.stderr
+        )
+
+def _render(args):
+    try:
+        paper_mm = lookup_size_mm(args.paper, PAPER_PRESETS)
+        label_mm = None if args.label.lower() == "auto" else lookup_size_mm(args.label, LABEL_PRESETS)
+        with open(args.input, "rb") as f:
+            header, rows = read_batch_table(f.read(), args.input)
+        items, errors = parse_batch_rows(header, rows, args.symbology)
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return EXIT_USAGE
+
+    if args.pack and (args.vector or args.exact_dpi or args.format != "pdf"):
+        print("error: --pack works with raster PDF output only", file=sys.stderr)
+        return EXIT_USAGE
+    if args.fit_font and (label_mm is None or args.pack):
+        print("error: --fit-font needs a fixed --label size and no --pack", file=sys.stderr)
+        return EXIT_USAGE
+
+    for line, msg in errors:
+        print(f"{args.input}:{line}: {msg}", file=sys.stderr)
+    if errors and (args.strict or not items):
+        print(f"error: {len(errors)} invalid row(s), nothing rendered", file=sys.stderr)
+        return EXIT_BAD_ROWS
+    if not items:
+        print("error: no rows to render", file=sys.stderr)
+        return EXIT_BAD_ROWS
+
+    compose_kwargs = dict(spacing_px=args.desc_spacing, font_size=args.font_size, position=args.position, word_break=args.word_break)
+    raster_kwargs = dict(mode=RASTER_MODES[args.mode], threshold=args.threshold)
+    def fit_label(img):
+        return compute_label_mm_from_composed(img, paper_mm, args.margin, args.spacing, args.orientation)
+
+    try:
+        # With --pack an "auto" label size is fitted per row instead
+        if label_mm is None and not args.pack:
+            first = render_label(items[0]["code"], items[0]["description"], items[0]["symbology"], **compose_kwargs, **raster_kwargs)
+            label_mm = fit_label(first)
+        size_text = "mixed sizes" if args.pack else f"{label_mm[0]}x{label_mm[1]} mm"
+
+        layout_args = (label_mm, paper_mm, args.margin, args.spacing, args.padding, args.orientation, args.landscape)
+        total = sum(it["quantity"] for it in items)
+        t0 = time.perf_counter()
+        if args.format != "pdf":
+            with open(args.out, "w", encoding="utf-8", newline="") as f:
+                count = render_printer_batch(
+                    args.format.upper(), _progress(items, len(items), args.quiet), label_mm, f,
+                    dpi=args.dpi, padding_mm=args.padding, gap_mm=args.gap, fit_font=args.fit_font, **compose_kwargs
+                )
+            pages = 0
+        elif args.vector:
+            def expanded():
+                for it in items:
+                    for _ in range(it["quantity"]):
+                        yield dict(it, quantity=1)
+            items_iter = _progress(expanded(), total, args.quiet)
+            _, count, pages = generate_pdf_vector(items_iter, *layout_args, **compose_kwargs, fit_font=args.fit_font, out=args.out)
+        elif args.pack:
+            render_kwargs = dict(workers=args.workers, chunk_size=args.chunk_size, **compose_kwargs, **raster_kwargs)
+            owners, sizes = plan_sized_labels(items, label_mm, fit_label, args.orientation, **render_kwargs)
+            def labels(order):
+                return _progress(iter_owned_labels(items, [owners[i] for i in order], encode=True, **render_kwargs), total, args.quiet)
+            _, count, pages = generate_pdf_packed(
+                sizes, labels, paper_mm, args.margin, args.spacing, args.padding, args.landscape, out=args.out
+            )
+        else:
+            if args.fit_font:
+                raster_kwargs["fit_mm"] = cell_inner_mm(label_mm, args.padding, args.orientation)
+            if args.exact_dpi:
+                # Padding is part of the bitmap, which fills its cell exactly
+                cell_mm = label_mm[::-1] if args.orientation == "Landscape" else label_mm
+                raster_kwargs.update(dpi=args.dpi, label_mm=cell_mm, padding_mm=args.padding)
+                layout_args = layout_args[:4] + (dict.fromkeys(SIDES, 0.0),) + layout_args[5:]
+            labels = iter_batch_labels(
+                items, workers=args.workers, chunk_size=args.chunk_size, encode=True, **compose_kwargs, **raster_kwargs
+            )
+            _, count, pages = generate_pdf_batch(_progress(labels, total, args.quiet), *layout_args, out=args.out)
+    except (OSError, ValueError) as e:
+        # Unwritable --out, a --pack label larger than the page, ...
+        print(f"error: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    elapsed = time.perf_counter() - t0
+
+    if not args.quiet and args.format != "pdf":
+        print(
+            f"{count} labels ({len(items)} {args.format.upper()} formats), {size_text} at {args.dpi} dpi "
+            f"in {elapsed:.2f} s ({count / max(elapsed, 1e-9):.0f} labels/s) -> {args.out}",
+            file=sys.stderr
+        )
+    elif not args.quiet:
+        print(
+            f"{count} labels, {pages} pages, {size_text} on {paper_mm[0]}x{paper_mm[1]} mm "
+            f"in {elapsed:.2f} s ({count / max(elapsed, 1e-9):.0f} labels/s) -> {args.out}",
+            file=sys.stderr
+        )
+    return EXIT_BAD_ROWS if errors else EXIT_OK
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "presets":
+        return cmd_presets(args)
+    return cmd_render(args)
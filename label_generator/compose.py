@@ -0,0 +1,322 @@
+# ============================================================
+# Label Generator — label composition
+# ============================================================
+
+import io
+from PIL import Image, ImageDraw
+
+from . import tracing
+from .presets import PX_PER_MM
+from .symbols import generate_symbol, code128_modules, qr_matrix
+from .text import load_font, safe_text_height, wrap_text_with_widths
+
+# ============================================================
+# UTILITIES
+# ============================================================
+def pil_to_bytes(img: Image.Image, fmt="PNG"):
+    with tracing.span("image.encode", format=fmt, px=img.width * img.height) as sp:
+        buf = io.BytesIO()
+        img.save(buf, format=fmt)
+        buf.seek(0)
+        data = buf.getvalue()
+        sp.set(bytes=len(data))
+    return data
+
+# Raster modes: "RGB" (default), "L" (8-bit gray) and "1" (1-bit, what a
+# thermal head prints). Labels are black on white, so "1" loses nothing
+# but anti-aliasing and is 24x smaller than RGB in memory, PNG and PDF.
+COLOR_MODES = ["RGB", "L", "1"]
+MONO_THRESHOLD = 128
+
+def to_mono(img, threshold=MONO_THRESHOLD):
+    # Hard threshold, no dithering: gray pixels >= threshold become white
+    lut = [255 if v >= threshold else 0 for v in range(256)]
+    return img.convert("L").point(lut, "1")
+
+# ============================================================
+# LABEL GEOMETRY
+# ============================================================
+# Shared by the raster and vector labels and by the font fit below, so a
+# fitted size is exactly what composing will produce.
+LABEL_PAD_PX = 8
+FIT_FONT_MIN = 8
+
+def _description_block(draw, font, desc, bw, position, word_break):
+    # Description wrapped below/beside a barcode bw px wide:
+    # (lines, widths, line height, block width, block height)
+    wrap_width = int(bw * 0.95) if position == "Bottom" else int((bw * 0.7))
+    lines, widths = wrap_text_with_widths(draw, font, desc, wrap_width, word_break)
+    line_h = safe_text_height(font)
+    return lines, widths, line_h, max(widths, default=0), len(lines) * (line_h + 2)
+
+def _canvas_size(bw, bh, desc_w, desc_h, spacing_px, position):
+    pad = LABEL_PAD_PX
+    if position == "Bottom":
+        return int(max(bw, desc_w) + pad * 2), int(bh + desc_h + spacing_px + pad * 2)
+    return int(bw + spacing_px + desc_w + pad * 2), int(max(bh, desc_h) + pad * 2)
+
+# Measuring only; "L" has the same font hinting as the RGB and L labels
+_measure_draw = ImageDraw.Draw(Image.new("L", (1, 1), "white"))
+
+def fit_description_font(barcode_size, description, fit_mm, spacing_px=5, position="Bottom", max_size=72, min_size=FIT_FONT_MIN, word_break="char"):
+    # Largest font size in [min_size, max_size] at which the description
+    # fits into fit_mm (the cell inside its padding) without shrinking the
+    # barcode below the size it would have on its own. barcode_size is the
+    # barcode as composed (after the target width). Binary search, and each
+    # candidate is only wrapped with cached word advances and added up, not
+    # composed. If even min_size doesn't fit, min_size is returned.
+    desc = " ".join(description.split())
+    if not desc:
+        return max_size
+    if fit_mm[0] <= 0 or fit_mm[1] <= 0:
+        # Padding wider than the label: nothing fits
+        return min_size
+    bw, bh = barcode_size
+    base_w, base_h = _canvas_size(bw, bh, 0, 0, spacing_px, position)
+    mm_per_px = min(fit_mm[0] / base_w, fit_mm[1] / base_h)
+    # A description adds height below the barcode or width beside it; with
+    # none to spare (the barcode alone fills that side) no size can fit
+    if position == "Bottom" and base_h * mm_per_px >= fit_mm[1] - 1e-9:
+        return min_size
+    if position != "Bottom" and base_w * mm_per_px >= fit_mm[0] - 1e-9:
+        return min_size
+
+    def fits(size):
+        _, _, _, desc_w, desc_h = _description_block(_measure_draw, load_font(size), desc, bw, position, word_break)
+        w, h = _canvas_size(bw, bh, desc_w, desc_h, spacing_px, position)
+        return w * mm_per_px <= fit_mm[0] + 1e-9 and h * mm_per_px <= fit_mm[1] + 1e-9
+
+    lo, hi = min_size, max(min_size, max_size)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if fits(mid):
+            lo = mid
+        else:
+            hi = mid - 1
+    if lo == min_size and not fits(lo):
+        # Wrapping isn't monotonic in the size: beside the barcode a larger
+        # font can wrap into a block that fits when smaller ones don't.
+        # Only then is every size tried.
+        lo = next((size for size in range(max_size, min_size, -1) if fits(size)), min_size)
+    return lo
+
+# ============================================================
+# COMPOSE LABEL IMAGE
+# ============================================================
+@tracing.traced("label.compose")
+def compose_label_image_wrapped(
+    barcode_img,
+    description,
+    spacing_px=5,
+    font_size=14,
+    target_barcode_width_px=420,
+    bg_color="white",
+    position="Bottom",
+    mode="RGB",
+    threshold=MONO_THRESHOLD,
+    word_break="char",
+    fit_mm=None
+):
+    # With fit_mm (the cell inside its padding, mm), font_size is the
+    # largest size tried: see fit_description_font
+    desc = " ".join(description.split())
+    # 1-bit labels are composed in gray (smooth resize and text), then thresholded
+    work_mode = "RGB" if mode == "RGB" else "L"
+
+    # Resize barcode
+    bc = barcode_img.copy().convert(work_mode)
+    if bc.width > target_barcode_width_px:
+        scale = target_barcode_width_px / bc.width
+        with tracing.span("compose.resize", px=bc.width * bc.height):
+            bc = bc.resize((int(bc.width * scale), int(bc.height * scale)), Image.LANCZOS)
+
+    bw, bh = bc.size
+
+    if fit_mm:
+        with tracing.span("text.fit", max_size=font_size) as sp:
+            font_size = fit_description_font((bw, bh), desc, fit_mm, spacing_px, position, font_size, word_break=word_break)
+            sp.set(size=font_size)
+    font = load_font(font_size)
+
+    with tracing.span("text.wrap", chars=len(desc)) as sp:
+        lines, widths, line_h, desc_w, desc_h = _description_block(_measure_draw, font, desc, bw, position, word_break)
+        sp.set(lines=len(lines))
+
+    pad = LABEL_PAD_PX
+    canvas_w, canvas_h = _canvas_size(bw, bh, desc_w, desc_h, spacing_px, position)
+
+    if position == "Bottom":
+        out = Image.new(work_mode, (canvas_w, canvas_h), bg_color)
+        draw = ImageDraw.Draw(out)
+
+        out.paste(bc, (int((canvas_w - bw)/2), pad))
+        y = pad + bh + spacing_px
+        for ln, w_ln in zip(lines, widths):
+            x_ln = int((canvas_w - w_ln)/2)
+            draw.text((x_ln, y), ln, font=font, fill="black")
+            y += line_h + 2
+
+    else:  # RIGHT
+        out = Image.new(work_mode, (canvas_w, canvas_h), bg_color)
+        draw = ImageDraw.Draw(out)
+
+        x_bc = pad
+        y_bc = pad + int((canvas_h - pad*2 - bh)/2)
+        out.paste(bc, (x_bc, y_bc))
+
+        x_desc = pad + bw + spacing_px
+        y_desc = pad + int((canvas_h - pad*2 - desc_h)/2)
+        for ln in lines:
+            draw.text((x_desc, y_desc), ln, font=font, fill="black")
+            y_desc += line_h + 2
+
+    return to_mono(out, threshold) if mode == "1" else out
+
+def render_label(code, description, symbology="Code128", spacing_px=5, font_size=14, position="Bottom", mode="RGB", threshold=MONO_THRESHOLD, word_break="char", fit_mm=None):
+    # QR symbols are already 1-bit; Code128 is drawn in gray for mono labels
+    options = {} if symbology == "QR" or mode == "RGB" else {"mode": "L"}
+    raw_bc = generate_symbol(symbology, code, **options)
+    return compose_label_image_wrapped(
+        raw_bc,
+        description,
+        spacing_px=spacing_px,
+        font_size=font_size,
+        position=position,
+        mode=mode,
+        threshold=threshold,
+        word_break=word_break,
+        fit_mm=fit_mm
+    )
+
+# ============================================================
+# VECTOR LABEL LAYOUT
+# ============================================================
+# Geometry of python-barcode's ImageWriter defaults (mm @ 300 dpi) so the
+# vector label has the same proportions as the raster one
+C128_DPI = 300
+C128_MODULE_MM = 0.2
+C128_BAR_MM = 15.0
+C128_QUIET_MM = 2.54
+C128_MARGIN_MM = 1.0
+C128_TEXT_DISTANCE_MM = 5.0
+C128_FONT_PT = 10
+QR_BOX_PX = 10
+
+def _module_runs(row):
+    # "0011101" -> [(2, 3), (6, 1)] as (start, length) of dark modules
+    runs, start = [], None
+    for i, v in enumerate(row):
+        if v and start is None:
+            start = i
+        elif not v and start is not None:
+            runs.append((start, i - start))
+            start = None
+    if start is not None:
+        runs.append((start, len(row) - start))
+    return runs
+
+def _symbol_vector(symbology, code, matrix=None):
+    # Returns (width, height, bars, texts) in raster px of the raw symbol.
+    # matrix: the QR's modules when the caller already encoded them
+    if symbology == "QR":
+        matrix = matrix or qr_matrix(code)
+        n = len(matrix) * QR_BOX_PX
+        bars = [
+            (x * QR_BOX_PX, y * QR_BOX_PX, w * QR_BOX_PX, QR_BOX_PX)
+            for y, row in enumerate(matrix)
+            for x, w in _module_runs(row)
+        ]
+        return n, n, bars, []
+
+    k = C128_DPI / 25.4
+    modules = code128_modules(code)
+    font_px = C128_FONT_PT * 25.4 / 72 * k
+    width = (2 * C128_QUIET_MM + len(modules) * C128_MODULE_MM) * k
+    height = (2 * C128_MARGIN_MM + C128_BAR_MM + C128_FONT_PT * 25.4 / 72 / 2 + C128_TEXT_DISTANCE_MM) * k
+    bars = [
+        ((C128_QUIET_MM + x * C128_MODULE_MM) * k, C128_MARGIN_MM * k,
+         w * C128_MODULE_MM * k, C128_BAR_MM * k)
+        for x, w in _module_runs([m == "1" for m in modules])
+    ]
+    # ImageWriter anchors the text on its descender line ("md")
+    descent = load_font(int(font_px)).getmetrics()[1]
+    baseline = (C128_MARGIN_MM + C128_BAR_MM + C128_TEXT_DISTANCE_MM) * k - descent
+    return int(width), int(height), bars, [(width / 2, baseline, code, font_px, "center")]
+
+def layout_label_vector(
+    code,
+    description,
+    symbology="Code128",
+    spacing_px=5,
+    font_size=14,
+    target_barcode_width_px=420,
+    position="Bottom",
+    word_break="char",
+    fit_mm=None
+):
+    # Same geometry as compose_label_image_wrapped, as draw operations
+    desc = " ".join(description.split())
+
+    # Encoded once here; printer layouts take the QR modules from "matrix"
+    matrix = qr_matrix(code) if symbology == "QR" else None
+    bw, bh, bars, texts = _symbol_vector(symbology, code, matrix)
+    scale = 1.0
+    if bw > target_barcode_width_px:
+        scale = target_barcode_width_px / bw
+        bw, bh = int(bw * scale), int(bh * scale)
+
+    if fit_mm:
+        font_size = fit_description_font((bw, bh), desc, fit_mm, spacing_px, position, font_size, word_break=word_break)
+    font = load_font(font_size)
+
+    lines, widths, line_h, desc_w, desc_h = _description_block(_measure_draw, font, desc, bw, position, word_break)
+    ascent = font.getmetrics()[0] if hasattr(font, "getmetrics") else line_h
+    pad = LABEL_PAD_PX
+    canvas_w, canvas_h = _canvas_size(bw, bh, desc_w, desc_h, spacing_px, position)
+
+    if position == "Bottom":
+        ox, oy = int((canvas_w - bw)/2), pad
+        y = pad + bh + spacing_px
+        desc_ops, desc_boxes = [], []
+        for ln, w_ln in zip(lines, widths):
+            desc_ops.append((int((canvas_w - w_ln)/2), y + ascent, ln, font_size, "left"))
+            desc_boxes.append((int((canvas_w - w_ln)/2), y, ln, w_ln))
+            y += line_h + 2
+    else:  # RIGHT
+        ox, oy = pad, pad + int((canvas_h - pad*2 - bh)/2)
+        x_desc = pad + bw + spacing_px
+        y_desc = pad + int((canvas_h - pad*2 - desc_h)/2)
+        desc_ops, desc_boxes = [], []
+        for ln, w_ln in zip(lines, widths):
+            desc_ops.append((x_desc, y_desc + ascent, ln, font_size, "left"))
+            desc_boxes.append((x_desc, y_desc, ln, w_ln))
+            y_desc += line_h + 2
+
+    return {
+        "size": (canvas_w, canvas_h),
+        "bars": [(ox + x*scale, oy + y*scale, w*scale, h*scale) for x, y, w, h in bars],
+        "texts": [(ox + x*scale, oy + y*scale, t, size*scale, align) for x, y, t, size, align in texts] + desc_ops,
+        # Boxes for printer languages that place their own symbols and text
+        "barcode": (ox, oy, bw, bh),
+        "matrix": matrix,
+        "desc": desc_boxes,
+        "line_height": line_h,
+        "font_size": font_size,
+    }
+
+# ============================================================
+# AUTO-FIT SIZE CALCULATION
+# ============================================================
+def compute_label_mm_from_composed(img, paper_mm, margins, spacing_mm, orientation):
+    w_mm = img.width / PX_PER_MM + 4
+    h_mm = img.height / PX_PER_MM + 4
+    if orientation == "Landscape":
+        w_mm, h_mm = h_mm, w_mm
+
+    usable_w = paper_mm[0] - margins["left"] - margins["right"]
+    usable_h = paper_mm[1] - margins["top"] - margins["bottom"]
+
+    w_mm = min(w_mm, max(5, usable_w - spacing_mm))
+    h_mm = min(h_mm, max(5, usable_h - spacing_mm))
+
+    return round(w_mm, 1), round(h_mm, 1)
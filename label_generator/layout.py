@@ -0,0 +1,117 @@
+# ============================================================
+# Label Generator — page grid layout
+# ============================================================
+# The one place where labels are laid out on a page. The PDF writers and
+# the preview take their cell rectangles from the same GridLayout, so
+# they always agree on rows, columns and positions.
+
+import math
+from functools import lru_cache
+
+SIDES = ["top", "bottom", "left", "right"]
+PT_PER_MM = 72 / 25.4
+
+class GridLayout:
+    # Labels in rows and columns on one page, all in mm with the origin at
+    # the top-left corner of the page. cells() converts to other units.
+    def __init__(self, label_mm, paper_mm, margins_mm, spacing_mm, padding_mm=None, label_orientation="Portrait", page_landscape=False):
+        lw, lh = label_mm
+        if label_orientation=="Landscape": lw, lh = lh, lw
+        pw, ph = paper_mm
+        if page_landscape: pw, ph = ph, pw
+
+        self.page_mm = (pw, ph)
+        self.label_mm = (lw, lh)
+        self.margins_mm = dict(margins_mm)
+        self.padding_mm = dict(padding_mm or dict.fromkeys(SIDES, 0.0))
+        self.spacing_mm = spacing_mm
+
+        m = self.margins_mm
+        usable_w = pw - m["left"] - m["right"]
+        usable_h = ph - m["top"] - m["bottom"]
+        # The epsilon keeps an exact fit from being lost to float rounding
+        self.cols = max(1, math.floor((usable_w + spacing_mm)/(lw + spacing_mm) + 1e-9))
+        self.rows = max(1, math.floor((usable_h + spacing_mm)/(lh + spacing_mm) + 1e-9))
+
+        self._cells_mm = tuple(
+            (m["left"] + c*(lw + spacing_mm), m["top"] + r*(lh + spacing_mm), lw, lh)
+            for r in range(self.rows)
+            for c in range(self.cols)
+        )
+        self._converted = {}
+
+    @property
+    def per_page(self):
+        return self.cols * self.rows
+
+    @staticmethod
+    def _factor(unit, scale):
+        if unit == "mm":
+            return 1.0
+        if unit == "pt":
+            return PT_PER_MM
+        if unit == "px":
+            if not scale:
+                raise ValueError("unit 'px' needs scale (pixels per mm)")
+            return scale
+        raise ValueError(f"Unknown unit: {unit}")
+
+    def page_size(self, unit="mm", scale=None):
+        k = self._factor(unit, scale)
+        w, h = self.page_mm[0]*k, self.page_mm[1]*k
+        return (round(w), round(h)) if unit == "px" else (w, h)
+
+    def label_size(self, unit="mm", scale=None):
+        k = self._factor(unit, scale)
+        w, h = self.label_mm[0]*k, self.label_mm[1]*k
+        return (round(w), round(h)) if unit == "px" else (w, h)
+
+    def cells(self, unit="mm", scale=None, origin="top", inner=False):
+        # (x, y, w, h) per cell, row by row. origin "bottom" measures y from
+        # the bottom of the page (PDF). inner=True gives the area inside the
+        # padding. Pixels are rounded; every cell keeps the same size.
+        # Results are computed once per argument set.
+        key = (unit, scale, origin, inner)
+        if key in self._converted:
+            return self._converted[key]
+
+        k = self._factor(unit, scale)
+        p = self.padding_mm
+        page_h = self.page_mm[1]
+        rects = []
+        for x, y, w, h in self._cells_mm:
+            if inner:
+                x, y = x + p["left"], y + p["top"]
+                w, h = w - p["left"] - p["right"], h - p["top"] - p["bottom"]
+            if origin == "bottom":
+                y = page_h - y - h
+            rects.append((x*k, y*k, w*k, h*k))
+
+        if unit == "px":
+            rects = [(round(x), round(y), round(w), round(h)) for x, y, w, h in rects]
+        self._converted[key] = tuple(rects)
+        return self._converted[key]
+
+def cell_inner_mm(label_mm, padding_mm=None, label_orientation="Portrait"):
+    # (w, h) mm inside the padding of one cell: the area a label is fitted to
+    lw, lh = label_mm
+    if label_orientation=="Landscape": lw, lh = lh, lw
+    p = padding_mm or dict.fromkeys(SIDES, 0.0)
+    return (lw - p["left"] - p["right"], lh - p["top"] - p["bottom"])
+
+@lru_cache(maxsize=64)
+def _cached_grid(label_mm, paper_mm, margins, spacing_mm, padding, label_orientation, page_landscape):
+    return GridLayout(
+        label_mm, paper_mm, dict(zip(SIDES, margins)), spacing_mm,
+        dict(zip(SIDES, padding)), label_orientation, page_landscape
+    )
+
+def page_grid(label_mm, paper_mm, margins_mm, spacing_mm, padding_mm=None, label_orientation="Portrait", page_landscape=False):
+    # Shared GridLayout per parameter set; treat it as read-only
+    padding_mm = padding_mm or dict.fromkeys(SIDES, 0.0)
+    return _cached_grid(
+        tuple(label_mm), tuple(paper_mm),
+        tuple(float(margins_mm[k]) for k in SIDES), float(spacing_mm),
+        tuple(float(padding_mm[k]) for k in SIDES),
+        label_orientation, bool(page_landscape)
+    )
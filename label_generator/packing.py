@@ -0,0 +1,91 @@
+# ============================================================
+# Label Generator — mixed-size sheet packing
+# ============================================================
+# For jobs that mix label sizes (shelf tags next to carton labels) a
+# uniform grid wastes most of the sheet. pack_labels() places labels of
+# any size on as few pages as it can with a shelf (guillotine) packer:
+#
+#   - labels are grouped by size and placed tallest first
+#   - a page is cut into horizontal shelves as tall as their first label
+#   - a smaller label goes into the first shelf with room, stacked in
+#     columns when several fit the shelf's height
+#
+# Work is per size group and shelf, not per label, so tens of thousands
+# of labels in a handful of sizes pack in milliseconds.
+
+import math
+
+EPS = 1e-9
+
+def pack_labels(sizes_mm, paper_mm, margins_mm, spacing_mm, page_landscape=False):
+    # sizes_mm: one (w, h) per label. Returns (placements, pages), where
+    # placements[i] = (page, x, y) is the top-left corner of label i in mm
+    # from the top-left of its page.
+    pw, ph = paper_mm
+    if page_landscape: pw, ph = ph, pw
+    m = margins_mm
+    usable_w = pw - m["left"] - m["right"]
+    usable_h = ph - m["top"] - m["bottom"]
+    sp = spacing_mm
+
+    groups = {}
+    for i, size in enumerate(sizes_mm):
+        groups.setdefault(tuple(size), []).append(i)
+    order = sorted(groups, key=lambda s: (-s[1], -s[0]))
+    for w, h in order:
+        if w > usable_w + EPS or h > usable_h + EPS:
+            raise ValueError(f"label {w:g}x{h:g} mm does not fit on a {pw:g}x{ph:g} mm page inside the margins")
+
+    # Smallest width and height still to come after each group; shelves
+    # and pages that can't take any of them are dropped from the search
+    min_w, min_h = [math.inf] * (len(order) + 1), [math.inf] * (len(order) + 1)
+    for g in range(len(order) - 1, -1, -1):
+        min_w[g] = min(min_w[g + 1], order[g][0])
+        min_h[g] = min(min_h[g + 1], order[g][1])
+
+    def fits(room, size):
+        # How many labels of `size` fit in `room` with spacing between them
+        return max(0, math.floor((room + sp) / (size + sp) + EPS))
+
+    placements = [None] * len(sizes_mm)
+    page_tops = []   # next free shelf y per page, relative to the margins
+    open_pages = []  # pages with height left for another shelf
+    shelves = []     # open shelves: [page, y, height, next x]
+
+    def fill(shelf, w, h, queue):
+        page, y, shelf_h, x = shelf
+        per_col = fits(shelf_h, h)
+        cols = min(fits(usable_w - x, w), -(-len(queue) // per_col)) if per_col else 0
+        for c in range(cols):
+            for r in range(per_col):
+                if not queue:
+                    break
+                placements[queue.pop()] = (
+                    page, m["left"] + x + c * (w + sp), m["top"] + y + r * (h + sp)
+                )
+        shelf[3] = x + cols * (w + sp)
+
+    for g, (w, h) in enumerate(order):
+        queue = groups[(w, h)][::-1]
+
+        for shelf in shelves:
+            if not queue:
+                break
+            if shelf[2] + EPS >= h:
+                fill(shelf, w, h, queue)
+
+        while queue:
+            page = next((p for p in open_pages if usable_h - page_tops[p] + EPS >= h), None)
+            if page is None:
+                page = len(page_tops)
+                page_tops.append(0.0)
+                open_pages.append(page)
+            shelf = [page, page_tops[page], h, 0.0]
+            page_tops[page] += h + sp
+            shelves.append(shelf)
+            fill(shelf, w, h, queue)
+
+        shelves = [s for s in shelves if usable_w - s[3] + EPS >= min_w[g + 1]]
+        open_pages = [p for p in open_pages if usable_h - page_tops[p] + EPS >= min_h[g + 1]]
+
+    return placements, max(1, len(page_tops))
@@ -0,0 +1,307 @@
+# ============================================================
+# Label Generator — PDF output
+# ============================================================
+
+import io
+import os
+import zlib
+import weakref
+import functools
+import hashlib
+import itertools
+from reportlab import rl_config
+from reportlab.pdfbase import pdfdoc
+from reportlab.pdfgen import canvas
+
+from . import tracing
+from .compose import layout_label_vector
+from .layout import page_grid, cell_inner_mm, PT_PER_MM
+from .packing import pack_labels
+from .text import load_pdf_font
+
+# ============================================================
+# PAGE GRID
+# ============================================================
+def compute_page_grid_pt(label_mm, paper_mm, margins_mm, spacing_mm, label_orientation="Portrait", page_landscape=False):
+    grid = page_grid(label_mm, paper_mm, margins_mm, spacing_mm, None, label_orientation, page_landscape)
+    cells = [(x, y) for x, y, _, _ in grid.cells("pt", origin="bottom")]
+    return grid.page_size("pt"), grid.label_size("pt"), cells
+
+# Labels are pulled lazily from `labels`, so only the current page's label
+# images are alive while the PDF is written. `out` may be a path or a binary
+# file object; without it the PDF is returned in a BytesIO.
+def _flow_labels_pdf(labels, draw_cell, label_mm, paper_mm, margins_mm, spacing_mm, padding_mm, label_orientation="Portrait", page_landscape=False, out=None):
+    grid = page_grid(label_mm, paper_mm, margins_mm, spacing_mm, padding_mm, label_orientation, page_landscape)
+    boxes = grid.cells("pt", origin="bottom", inner=True)
+
+    buf = io.BytesIO() if out is None else out
+    pdf = canvas.Canvas(buf, pagesize=grid.page_size("pt"))
+    if tracing.enabled():
+        draw_cell = _traced_drawer(draw_cell)
+
+    count = 0
+    for label in labels:
+        if count and count % len(boxes) == 0:
+            _end_page(pdf, len(boxes))
+
+        draw_cell(pdf, label, *boxes[count % len(boxes)])
+        count += 1
+
+    pages = max(1, -(-count // len(boxes)))
+    _end_page(pdf, count - (pages - 1) * len(boxes))
+    _save_pdf(pdf, buf)
+    if out is None:
+        buf.seek(0)
+    return buf, count, pages
+
+def _traced_drawer(draw_cell):
+    # A span per cell, only while tracing; pages are numbered from 1
+    count = itertools.count()
+
+    def traced(pdf, label, *box):
+        with tracing.span("pdf.draw", page=pdf.getPageNumber(), label=next(count)):
+            draw_cell(pdf, label, *box)
+
+    return traced
+
+def _end_page(pdf, labels):
+    tracing.event("pdf.page", page=pdf.getPageNumber(), labels=labels)
+    pdf.showPage()
+
+def _save_pdf(pdf, buf):
+    with tracing.span("pdf.save") as sp:
+        pdf.save()
+        sp.set(bytes=buf.tell() if hasattr(buf, "tell") else os.path.getsize(buf))
+
+def _image_cell_drawer():
+    # Every distinct label is embedded once, wrapped in a form XObject that
+    # all cells on all pages reference. Labels are matched by content, so
+    # identical rows of a batch share one image stream too. A label is a
+    # PIL image or an EncodedLabel whose pixels a pool worker already
+    # compressed; either way the parent only compresses what it must.
+    forms = {}
+    # id(label) -> (weak reference, form): each label object is hashed once
+    # however its cells interleave. The weak reference drops the entry when
+    # the label is freed, before its id can be reused, so labels don't
+    # outlive their page.
+    seen = {}
+
+    def forget(_, key):
+        seen.pop(key, None)
+
+    def draw_cell(pdf, label, x, y, w, h):
+        entry = seen.get(id(label))
+        if entry is None:
+            encoded = label if isinstance(label, EncodedLabel) else None
+            key = encoded.digest if encoded else image_digest(label)
+            if key not in forms:
+                encoded = encoded or encode_label_image(label)
+                name = f"img{len(forms)}"
+                fw, fh = encoded.size
+                with tracing.span("pdf.embed", mode=encoded.mode, px=fw * fh, bytes=len(encoded.stream)):
+                    pdf.beginForm(name, 0, 0, fw, fh)
+                    draw_encoded_image(pdf, encoded, 0, 0, fw, fh)
+                    pdf.endForm()
+                forms[key] = (name, encoded.size, encoded.dpi)
+            ref = weakref.ref(label, functools.partial(forget, key=id(label)))
+            entry = seen[id(label)] = (ref, forms[key])
+
+        name, size, dpi = entry[1]
+        place_form(pdf, name, size, x, y, w, h, dpi)
+
+    return draw_cell
+
+def generate_pdf_batch(label_imgs, label_mm, paper_mm, margins_mm, spacing_mm, padding_mm, label_orientation="Portrait", page_landscape=False, out=None):
+    return _flow_labels_pdf(
+        label_imgs, _image_cell_drawer(), label_mm, paper_mm, margins_mm, spacing_mm, padding_mm,
+        label_orientation, page_landscape, out
+    )
+
+def generate_pdf_packed(sizes_mm, label_imgs, paper_mm, margins_mm, spacing_mm, padding_mm, page_landscape=False, out=None):
+    # Mixed label sizes, placed by pack_labels instead of a uniform grid.
+    # sizes_mm holds one (w, h) mm per printed label and is packed before
+    # anything is drawn. label_imgs(order) gets the label indices in drawing
+    # order (page by page) and yields their images lazily, so only the
+    # labels in flight are alive (iter_owned_labels).
+    placements, pages = pack_labels(sizes_mm, paper_mm, margins_mm, spacing_mm, page_landscape)
+    order = sorted(range(len(sizes_mm)), key=lambda i: placements[i][0])
+    pw, ph = paper_mm
+    if page_landscape: pw, ph = ph, pw
+    p = padding_mm
+
+    buf = io.BytesIO() if out is None else out
+    pdf = canvas.Canvas(buf, pagesize=(pw * PT_PER_MM, ph * PT_PER_MM))
+    draw_cell = _image_cell_drawer()
+    if tracing.enabled():
+        draw_cell = _traced_drawer(draw_cell)
+
+    page, on_page = 0, 0
+    for i, label_img in zip(order, label_imgs(order)):
+        (w, h), (label_page, x, y) = sizes_mm[i], placements[i]
+        while page < label_page:
+            _end_page(pdf, on_page)
+            page, on_page = page + 1, 0
+        draw_cell(
+            pdf,
+            label_img,
+            (x + p["left"]) * PT_PER_MM,
+            (ph - y - h + p["bottom"]) * PT_PER_MM,
+            (w - p["left"] - p["right"]) * PT_PER_MM,
+            (h - p["top"] - p["bottom"]) * PT_PER_MM
+        )
+        on_page += 1
+
+    _end_page(pdf, on_page)
+    _save_pdf(pdf, buf)
+    if out is None:
+        buf.seek(0)
+    return buf, len(sizes_mm), pages
+
+def _digest(mode, size, raw):
+    return hashlib.md5(mode.encode() + repr(size).encode() + raw).hexdigest()
+
+def image_digest(img):
+    return _digest(img.mode, img.size, img.tobytes())
+
+# ============================================================
+# IMAGE STREAMS
+# ============================================================
+# ReportLab widens every image to 8-bit RGB, so 1-bit and gray labels
+# would be stored three (or 24) times larger, and it compresses them in
+# the process that writes the PDF. Labels are embedded from Pillow's own
+# rows instead: 1 bit per pixel (0 = black, DeviceGray's order), 8-bit
+# gray, or RGB, compressed once by encode_label_image, which the batch
+# pool runs in its workers.
+class EncodedLabel:
+    __slots__ = ("digest", "mode", "size", "dpi", "stream", "__weakref__")
+
+def encode_label_image(img):
+    if img.mode not in ("1", "L", "RGB"):
+        img = img.convert("RGB")
+    with tracing.span("pdf.encode", mode=img.mode, px=img.width * img.height) as sp:
+        raw = img.tobytes()
+        label = EncodedLabel()
+        label.digest = _digest(img.mode, img.size, raw)
+        label.mode = img.mode
+        label.size = img.size
+        label.dpi = img.info.get("printer_dpi")
+        label.stream = zlib.compress(raw)
+        if rl_config.useA85:
+            label.stream = pdfdoc.asciiBase85Encode(label.stream)
+        sp.set(bytes=len(label.stream))
+    return label
+
+class EncodedImageXObject(pdfdoc.PDFImageXObject):
+    def __init__(self, name, label):
+        self.name = name
+        self.width, self.height = label.size
+        self.bitsPerComponent = 1 if label.mode == "1" else 8
+        self.colorSpace = "DeviceRGB" if label.mode == "RGB" else "DeviceGray"
+        self.mask = None
+        self.streamContent = label.stream
+        self._filters = ("ASCII85Decode", "FlateDecode") if rl_config.useA85 else ("FlateDecode",)
+
+def draw_encoded_image(pdf, label, x, y, w, h):
+    # Registered the same way canvas.drawImage registers its images, through
+    # canvas internals (_doc, _setXObjects, _formsinuse): reportlab is pinned
+    # in requirements.txt for that
+    name = "raw" + label.digest
+    reg_name = pdf._doc.getXObjectName(name)
+    if not pdf._doc.idToObject.get(reg_name):
+        obj = EncodedImageXObject(name, label)
+        pdf._setXObjects(obj)
+        pdf._doc.Reference(obj, reg_name)
+        pdf._doc.addForm(name, obj)
+    pdf._currentPageHasImages = 1
+    pdf.saveState()
+    pdf.translate(x, y)
+    pdf.scale(w, h)
+    pdf._code.append(f"/{reg_name} Do")
+    pdf.restoreState()
+    pdf._formsinuse.append(name)
+
+def place_form(pdf, name, size, x, y, w, h, dpi=None):
+    # Same fit as drawImage(preserveAspectRatio=True, anchor="sw"). A bitmap
+    # rendered at the printer's dpi is placed at exactly 72/dpi pt per pixel
+    # instead: its whole-dot size can differ from the cell by up to half a
+    # dot, and fitting would make the RIP resample it.
+    fw, fh = size
+    scale = 72 / dpi if dpi else min(w / fw, h / fh)
+    pdf.saveState()
+    pdf.translate(x, y)
+    pdf.scale(scale, scale)
+    pdf.doForm(name)
+    pdf.restoreState()
+
+def pdf_xobject_counts(pdf_bytes):
+    # Number of image and form XObjects actually written to a PDF
+    return {
+        "images": pdf_bytes.count(b"/Subtype /Image"),
+        "forms": pdf_bytes.count(b"/Subtype /Form"),
+    }
+
+# ============================================================
+# VECTOR PDF
+# ============================================================
+def draw_label_form(pdf, name, layout, font_name):
+    w, h = layout["size"]
+    pdf.beginForm(name, 0, 0, w, h)
+    pdf.setFillColorRGB(0, 0, 0)
+
+    path = pdf.beginPath()
+    for x, y, bw, bh in layout["bars"]:
+        path.rect(x, h - y - bh, bw, bh)
+    pdf.drawPath(path, stroke=0, fill=1)
+
+    for x, baseline, text, size, align in layout["texts"]:
+        pdf.setFont(font_name, size)
+        if align == "center":
+            pdf.drawCentredString(x, h - baseline, text)
+        else:
+            pdf.drawString(x, h - baseline, text)
+    pdf.endForm()
+
+def generate_pdf_vector(items, label_mm, paper_mm, margins_mm, spacing_mm, padding_mm, label_orientation="Portrait", page_landscape=False, spacing_px=5, font_size=14, position="Bottom", word_break="char", fit_font=False, out=None):
+    font_name = load_pdf_font()
+    forms = {}
+    fit_mm = cell_inner_mm(label_mm, padding_mm, label_orientation) if fit_font else None
+
+    def labels():
+        for item in items:
+            for _ in range(item.get("quantity", 1)):
+                yield item
+
+    def draw_cell(pdf, item, x, y, w, h):
+        key = (item["code"], item["description"], item["symbology"])
+        if key not in forms:
+            with tracing.span("pdf.embed", mode="vector"):
+                layout = layout_label_vector(
+                    item["code"],
+                    item["description"],
+                    item["symbology"],
+                    spacing_px=spacing_px,
+                    font_size=font_size,
+                    position=position,
+                    word_break=word_break,
+                    fit_mm=fit_mm
+                )
+                name = f"label{len(forms)}"
+                draw_label_form(pdf, name, layout, font_name)
+            forms[key] = (name, layout["size"])
+
+        name, size = forms[key]
+        place_form(pdf, name, size, x, y, w, h)
+
+    return _flow_labels_pdf(
+        labels(), draw_cell, label_mm, paper_mm, margins_mm, spacing_mm, padding_mm,
+        label_orientation, page_landscape, out
+    )
+
+def generate_pdf(label_img, label_mm, paper_mm, margins_mm, spacing_mm, padding_mm, label_orientation="Portrait", page_landscape=False, out=None):
+    grid = page_grid(label_mm, paper_mm, margins_mm, spacing_mm, padding_mm, label_orientation, page_landscape)
+    buf, _, _ = generate_pdf_batch(
+        itertools.repeat(label_img, grid.per_page),
+        label_mm, paper_mm, margins_mm, spacing_mm, padding_mm,
+        label_orientation, page_landscape, out
+    )
+    return buf
@@ -0,0 +1,50 @@
+# ============================================================
+# Label Generator — presets
+# ============================================================
+
+PX_PER_MM = 96.0 / 25.4  # ~3.7795 px per mm
+
+LABEL_PRESETS = {
+    "38×100 mm": (38, 100),
+    "50×100 mm": (50, 100),
+    "32×64 mm": (32, 64),
+    "18×50 mm": (18, 50),
+    "13×38 mm": (13, 38),
+    "8×20 mm": (8, 20),
+    "38×75 mm": (38, 75),
+    "11×30 mm": (11, 30),
+}
+
+PAPER_PRESETS = {
+    "A3": (297, 420),
+    "A4": (210, 297),
+    "A5": (148, 210),
+    "4R (102×152 mm)": (102, 152),
+    "4R (102×102 mm)": (102, 102),
+    "26 × 15 mm": (26, 15),
+    "33 × 15 mm": (33, 15),
+    "33 × 25 mm": (33, 25),
+    "48 × 33 mm": (48, 33),
+    "60 × 30 mm": (60, 30),
+    "76 × 35 mm": (76, 35),
+    "100 × 50 mm": (100, 50),
+}
+
+def _size_key(name):
+    return name.lower().replace("×", "x").replace("mm", "").replace(" ", "")
+
+def lookup_size_mm(value, presets):
+    # Preset name ("A4", "38×100 mm", "38x100") or a free "WxH" size in mm
+    if value in presets:
+        return presets[value]
+    wanted = _size_key(value)
+    for name, size in presets.items():
+        if _size_key(name) == wanted:
+            return size
+    try:
+        w, h = (float(v) for v in wanted.split("x"))
+    except ValueError:
+        raise ValueError(f"unknown size {value!r}: use a preset name or WxH in mm")
+    if w <= 0 or h <= 0:
+        raise ValueError(f"size must be positive: {value!r}")
+    return w, h
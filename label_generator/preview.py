@@ -0,0 +1,92 @@
+# ============================================================
+# Label Generator — page preview
+# ============================================================
+
+import collections
+from PIL import Image, ImageDraw
+
+from .pdf import image_digest
+from .layout import page_grid
+
+PREVIEW_CACHE_SIZE = 16
+
+# Finished previews by (label digest, layout parameters). Every Streamlit
+# rerun asks for the same preview again; cached images must not be modified.
+_preview_cache = collections.OrderedDict()
+
+# ============================================================
+# CELL TILE
+# ============================================================
+def _cell_tile(li, mode, lw_px, lh_px, pads):
+    # One cell (outer border, padding border, centered label) and a mask of
+    # the pixels it covers, so tiles overlap exactly like drawn cells would
+    pt, pb, pl, pr = pads
+    size = (lw_px + 1, lh_px + 1)
+    tile = Image.new(mode, size, "white")
+    mask = Image.new("1", size, 0)
+    draw, draw_mask = ImageDraw.Draw(tile), ImageDraw.Draw(mask)
+
+    ix1, iy1 = pl, pt
+    ix2, iy2 = lw_px - pr, lh_px - pb
+    for d, outer, inner in ((draw, "#666666", "#cccccc"), (draw_mask, 1, 1)):
+        d.rectangle((0, 0, lw_px, lh_px), outline=outer, width=2)
+        d.rectangle((ix1, iy1, ix2, iy2), outline=inner, width=1)
+
+    px = ix1 + ((ix2 - ix1 - li.width)//2)
+    py = iy1 + ((iy2 - iy1 - li.height)//2)
+    tile.paste(li, (px, py))
+    mask.paste(1, (px, py, px + li.width, py + li.height))
+    return tile, mask
+
+# ============================================================
+# PAGE PREVIEW
+# ============================================================
+def generate_pdf_preview(label_img, label_mm, paper_mm, margins_mm, spacing_mm, padding_mm, label_orientation="Portrait", max_px=900, page_landscape=False, mode="RGB"):
+    # Monochrome labels ("L" or "1") get a grayscale page: a third of the
+    # RGB memory, and the shrunken label keeps its anti-aliased edges
+    key = (
+        image_digest(label_img), tuple(label_mm), tuple(paper_mm),
+        tuple(sorted(margins_mm.items())), spacing_mm, tuple(sorted(padding_mm.items())),
+        label_orientation, max_px, page_landscape, mode,
+    )
+    if key in _preview_cache:
+        _preview_cache.move_to_end(key)
+        return _preview_cache[key]
+
+    pw, ph = paper_mm
+    if page_landscape: pw, ph = ph, pw
+    scale = max_px/max(pw, ph)
+    scale = min(max(scale, 2), 12)
+
+    # Same cells as the PDF, in pixels at this scale
+    grid = page_grid(label_mm, paper_mm, margins_mm, spacing_mm, padding_mm, label_orientation, page_landscape)
+    cols, rows = grid.cols, grid.rows
+    cells = grid.cells("px", scale)
+    lw_px, lh_px = grid.label_size("px", scale)
+    ix, iy, iw, ih = grid.cells("px", scale, inner=True)[0]
+    pl, pt = ix - cells[0][0], iy - cells[0][1]
+    pr, pb = lw_px - pl - iw, lh_px - pt - ih
+
+    page_mode = "RGB" if mode == "RGB" else "L"
+    preview = Image.new(page_mode, grid.page_size("px", scale), "white")
+
+    li = label_img.copy().convert(page_mode)
+    li.thumbnail((lw_px - pl - pr, lh_px - pt - pb))
+
+    # The cell is drawn once, copied across one row, and the row copied
+    # down the page: cols + rows pastes instead of a draw per cell
+    tile, tile_mask = _cell_tile(li, page_mode, lw_px, lh_px, (pt, pb, pl, pr))
+    x0 = cells[0][0]
+    strip_size = (cells[cols - 1][0] - x0 + tile.width, tile.height)
+    strip = Image.new(page_mode, strip_size, "white")
+    strip_mask = Image.new("1", strip_size, 0)
+    for x, _, _, _ in cells[:cols]:
+        strip.paste(tile, (x - x0, 0), tile_mask)
+        strip_mask.paste(1, (x - x0, 0), tile_mask)
+    for _, y, _, _ in cells[::cols]:
+        preview.paste(strip, (x0, y), strip_mask)
+
+    _preview_cache[key] = (preview, cols, rows)
+    while len(_preview_cache) > PREVIEW_CACHE_SIZE:
+        _preview_cache.popitem(last=False)
+    return preview, cols, rows
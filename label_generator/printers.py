@@ -0,0 +1,468 @@
+# ============================================================
+# Label Generator — thermal printer languages
+# ============================================================
+# Emits native printer commands (barcode and text fields) instead of a
+# bitmap, so a label is a few hundred bytes and prints at full speed.
+# Geometry comes from layout_label_vector, scaled into the label the same
+# way the PDF places a label in its cell, so all outputs agree.
+
+import math
+from PIL import Image, ImageDraw
+
+from . import tracing
+from .compose import (
+    layout_label_vector,
+    to_mono,
+    _measure_draw,
+    MONO_THRESHOLD,
+    C128_MODULE_MM,
+    C128_QUIET_MM,
+    C128_MARGIN_MM,
+    C128_BAR_MM,
+    C128_TEXT_DISTANCE_MM,
+    C128_FONT_PT,
+)
+from .symbols import code128_modules, rasterize_modules
+from .text import BREAK_MARKS, load_font, safe_text_width, safe_text_height, wrap_text_with_widths
+from .layout import cell_inner_mm
+
+PRINTER_DPIS = [203, 300, 600]
+QR_BORDER = 2
+# Smallest description text in dots that still prints legibly
+MIN_FONT_DOTS = 8
+
+# ============================================================
+# GEOMETRY (printer dots)
+# ============================================================
+@tracing.traced("printer.layout")
+def printer_geometry(
+    code,
+    description,
+    label_mm,
+    symbology="Code128",
+    spacing_px=5,
+    font_size=14,
+    position="Bottom",
+    padding_mm=None,
+    dpi=203,
+    word_break="char",
+    fit_font=False
+):
+    # fit_font: font_size is the largest description size, shrunk to fit
+    # the label inside its padding (fit_description_font)
+    padding_mm = padding_mm or {"top": 1, "bottom": 1, "left": 1, "right": 1}
+    layout = layout_label_vector(
+        code, description, symbology, spacing_px=spacing_px, font_size=font_size, position=position,
+        word_break=word_break, fit_mm=cell_inner_mm(label_mm, padding_mm) if fit_font else None
+    )
+    dpmm = dpi / 25.4
+    p = {k: padding_mm[k] * dpmm for k in padding_mm}
+
+    label_w, label_h = round(label_mm[0] * dpmm), round(label_mm[1] * dpmm)
+    avail_w = label_w - p["left"] - p["right"]
+    avail_h = label_h - p["top"] - p["bottom"]
+
+    # Fit like the PDF: keep aspect ratio, anchored bottom-left
+    cw, ch = layout["size"]
+    s = min(avail_w / cw, avail_h / ch)
+    x0 = p["left"]
+    y0 = label_h - p["bottom"] - ch * s
+
+    bx, by, bw, bh = layout["barcode"]
+    bx, by, bw, bh = x0 + bx * s, y0 + by * s, bw * s, bh * s
+
+    if symbology == "QR":
+        # The layout's matrix includes a QR_BORDER-module quiet zone; the
+        # symbol itself is the modules inside it
+        b = QR_BORDER
+        matrix = [row[b:-b] for row in layout["matrix"][b:-b]]
+        n = len(matrix)
+        module = max(1, min(10, math.floor(bw / (n + 2 * QR_BORDER))))
+        symbol = {
+            "x": round(bx + (bw - n * module) / 2),
+            "y": round(by + (bh - n * module) / 2),
+            "module": module,
+            "size": n * module,
+            "matrix": matrix,
+        }
+    else:
+        modules = code128_modules(code)
+        _, baseline, _, text_px, _ = layout["texts"][0]
+        total_mm = 2 * C128_MARGIN_MM + C128_BAR_MM + C128_FONT_PT * 25.4 / 72 / 2 + C128_TEXT_DISTANCE_MM
+        quiet = C128_QUIET_MM / C128_MODULE_MM
+        module = max(1, math.floor(bw / (len(modules) + 2 * quiet)))
+        symbol = {
+            "x": round(bx + (bw - module * len(modules)) / 2),
+            "y": round(by + bh * C128_MARGIN_MM / total_mm),
+            "module": module,
+            "height": max(1, round(bh * C128_BAR_MM / total_mm)),
+            "width": module * len(modules),
+            # Human-readable line, drawn by the printer itself in ZPL/TSPL/EPL
+            "text_baseline": round(y0 + baseline * s),
+            "text_size": max(8, round(text_px * s)),
+        }
+
+    lines = []
+    for x, top, text, w in layout["desc"]:
+        lines.append({
+            "x": round(x0 + x * s),
+            "y": round(y0 + top * s),
+            "width": round(w * s),
+            "text": text,
+        })
+
+    geometry = {
+        "dpi": dpi,
+        "label": (label_w, label_h),
+        "symbology": symbology,
+        "code": code,
+        "symbol": symbol,
+        "lines": lines,
+        # Text is centered across the whole label area in "Bottom" position
+        "text_box": (round(x0), round(cw * s)) if position == "Bottom" else None,
+        "font_height": round(layout["font_size"] * s),
+        # For backends that wrap the description again (EPL, small text)
+        "text": " ".join(description.split()),
+        "wrap_width": int(bw * (0.95 if position == "Bottom" else 0.7)),
+        "line_pitch": (layout["line_height"] + 2) * s,
+        "word_break": word_break,
+    }
+    if geometry["font_height"] < MIN_FONT_DOTS:
+        # The layout's lines are too close for legible text: wrap again at
+        # the smallest size and space the lines by its own height
+        font = load_font(MIN_FONT_DOTS)
+        texts, widths = wrap_text_with_widths(_measure_draw, font, geometry["text"], geometry["wrap_width"], word_break)
+        restack_lines(geometry, texts, widths, safe_text_height(font) + 2)
+        geometry["font_height"] = MIN_FONT_DOTS
+    return geometry
+
+def restack_lines(geometry, texts, widths, pitch):
+    # Replaces geometry["lines"] with `texts` (widths in dots), `pitch` dots
+    # apart: from the same first line below the symbol, or around the same
+    # vertical center beside it
+    g = geometry
+    old = g["lines"]
+    if not old:
+        return
+    if g["text_box"]:
+        bx, bw = g["text_box"]
+        top = old[0]["y"]
+    else:
+        top = old[0]["y"] + (len(old) * g["line_pitch"] - len(texts) * pitch) / 2
+    g["lines"] = [
+        {
+            "x": round(bx + (bw - w) / 2) if g["text_box"] else old[0]["x"],
+            "y": round(top + i * pitch),
+            "width": round(w),
+            "text": text,
+        }
+        for i, (text, w) in enumerate(zip(texts, widths))
+    ]
+    g["line_pitch"] = pitch
+
+# ============================================================
+# PRINTER LANGUAGES
+# ============================================================
+class PrinterLanguage:
+    # One backend per command language. render() turns the geometry from
+    # printer_geometry() into the commands for one label format, printed
+    # `quantity` times. gap_mm is the gap between labels on the roll.
+    name = ""
+    extension = ""
+
+    def render(self, geometry, quantity=1, gap_mm=2.0):
+        raise NotImplementedError
+
+# ------------------------------------------------------------
+# ZPL II (Zebra)
+# ------------------------------------------------------------
+def _zpl_field(text):
+    # Used with ^FH: control characters and non-ASCII become _XX (UTF-8)
+    out = []
+    for ch in text:
+        if ch in "^~_" or not 32 <= ord(ch) < 127:
+            out.extend(f"_{b:02X}" for b in ch.encode("utf-8"))
+        else:
+            out.append(ch)
+    return "".join(out)
+
+class ZPL(PrinterLanguage):
+    name = "ZPL"
+    extension = "zpl"
+
+    def render(self, geometry, quantity=1, gap_mm=2.0):
+        # ZPL printers sense the gap themselves
+        g = geometry
+        sym = g["symbol"]
+        cmds = [
+            "^XA",
+            "^CI28",
+            f"^PW{g['label'][0]}",
+            f"^LL{g['label'][1]}",
+            "^LH0,0",
+        ]
+
+        if g["symbology"] == "QR":
+            # Model 2, error correction M, automatic data mode
+            cmds.append(f"^FO{sym['x']},{sym['y']}^BQN,2,{sym['module']}^FH^FDMA,{_zpl_field(g['code'])}^FS")
+        else:
+            cmds.append(
+                f"^FO{sym['x']},{sym['y']}^BY{sym['module']},3,{sym['height']}"
+                f"^BCN,{sym['height']},Y,N,N,A^FH^FD{_zpl_field(g['code'])}^FS"
+            )
+
+        h = g["font_height"]
+        for ln in g["lines"]:
+            if g["text_box"]:
+                x, w = g["text_box"]
+                cmds.append(f"^FO{x},{ln['y']}^A0N,{h}^FB{w},1,0,C^FH^FD{_zpl_field(ln['text'])}^FS")
+            else:
+                cmds.append(f"^FO{ln['x']},{ln['y']}^A0N,{h}^FH^FD{_zpl_field(ln['text'])}^FS")
+
+        if quantity > 1:
+            cmds.append(f"^PQ{quantity}")
+        cmds.append("^XZ")
+        return "\n".join(cmds) + "\n"
+
+# ------------------------------------------------------------
+# TSPL / TSPL2 (TSC, Godex in TSPL emulation)
+# ------------------------------------------------------------
+def _tspl_string(text):
+    return '"' + text.replace('"', '\\["]') + '"'
+
+class TSPL(PrinterLanguage):
+    name = "TSPL"
+    extension = "tspl"
+
+    def render(self, geometry, quantity=1, gap_mm=2.0):
+        g = geometry
+        sym = g["symbol"]
+        dpmm = g["dpi"] / 25.4
+        cmds = [
+            f"SIZE {g['label'][0] / dpmm:.1f} mm, {g['label'][1] / dpmm:.1f} mm",
+            f"GAP {gap_mm:g} mm, 0 mm",
+            "CODEPAGE UTF-8",
+            "CLS",
+        ]
+
+        if g["symbology"] == "QR":
+            cmds.append(f"QRCODE {sym['x']},{sym['y']},M,{sym['module']},A,0,{_tspl_string(g['code'])}")
+        else:
+            # "128" picks subsets A/B/C automatically; 2 = readable text centered
+            cmds.append(
+                f"BARCODE {sym['x']},{sym['y']},\"128\",{sym['height']},2,0,"
+                f"{sym['module']},{sym['module']},{_tspl_string(g['code'])}"
+            )
+
+        # Font "0" is the scalable font; its multipliers are point sizes
+        pt = max(1, round(g["font_height"] / g["dpi"] * 72))
+        for ln in g["lines"]:
+            if g["text_box"]:
+                x, w = g["text_box"]
+                cmds.append(
+                    f"BLOCK {x},{ln['y']},{w},{g['font_height'] * 2},\"0\",0,{pt},{pt},0,2,"
+                    f"{_tspl_string(ln['text'])}"
+                )
+            else:
+                cmds.append(f"TEXT {ln['x']},{ln['y']},\"0\",0,{pt},{pt},{_tspl_string(ln['text'])}")
+
+        cmds.append(f"PRINT 1,{quantity}")
+        return "\r\n".join(cmds) + "\r\n"
+
+# ------------------------------------------------------------
+# EPL2 (Eltron, older Zebra desktop printers)
+# ------------------------------------------------------------
+# Resident fonts 1-5 at 203 dpi: (character width, height) in dots,
+# including inter-character gap. They scale with the printer's dpi.
+EPL_FONTS = {1: (10, 12), 2: (12, 16), 3: (14, 20), 4: (16, 24), 5: (34, 48)}
+
+def _epl_string(text):
+    return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+def _wrap_chars(text, max_chars, word_break="char"):
+    # wrap_text_with_widths for a fixed-width font, in characters. A word
+    # longer than a line is broken per word_break like break_word does.
+    mark = BREAK_MARKS[word_break]
+    lines, current = [], ""
+    for word in text.split():
+        if current and len(current) + 1 + len(word) <= max_chars:
+            current += " " + word
+            continue
+        if current:
+            lines.append(current)
+        current = word
+        if len(word) > max_chars and word_break != "none":
+            step = max(1, max_chars - len(mark))
+            while len(current) > max_chars:
+                lines.append(current[:step] + mark)
+                if word_break == "ellipsis":
+                    current = lines.pop()
+                    break
+                current = current[step:]
+    if current:
+        lines.append(current)
+    return lines
+
+def _epl_font(height_dots, dpi):
+    # Tallest resident font x multiplier that still fits height_dots
+    # (a native glyph size wins over a magnified smaller font)
+    k = dpi / 203
+    best = (EPL_FONTS[1][1] * k, -1, 1)
+    for font, (_, h) in EPL_FONTS.items():
+        mul = int(height_dots // (h * k))
+        if 1 <= mul <= 9:
+            best = max(best, (h * k * mul, -mul, font))
+    _, mul, font = best
+    return font, -mul, EPL_FONTS[font][0] * k * -mul
+
+class EPL(PrinterLanguage):
+    name = "EPL"
+    extension = "epl"
+
+    def render(self, geometry, quantity=1, gap_mm=2.0):
+        g = geometry
+        sym = g["symbol"]
+        dpmm = g["dpi"] / 25.4
+        cmds = [
+            "",
+            "N",
+            f"q{g['label'][0]}",
+            f"Q{g['label'][1]},{round(gap_mm * dpmm)}",
+        ]
+
+        if g["symbology"] == "QR":
+            cmds.append(f"b{sym['x']},{sym['y']},Q,m2,s{sym['module']},eM,{_epl_string(g['code'])}")
+        else:
+            # Type 1 = Code128 with automatic A/B/C subsets, B = readable text
+            cmds.append(
+                f"B{sym['x']},{sym['y']},0,1,{sym['module']},{sym['module']},"
+                f"{sym['height']},B,{_epl_string(g['code'])}"
+            )
+
+        # Resident fonts are fixed-width and wider than the layout's font, so
+        # the description is wrapped again by character count: across the
+        # text box below the symbol, or up to the label edge beside it. Lines
+        # are centered on the font's advance (EPL has no alignment).
+        font, mul, char_w = _epl_font(g["font_height"], g["dpi"])
+        g = dict(g)
+        if g["text_box"]:
+            room = g["text_box"][1]
+        else:
+            room = g["label"][0] - g["lines"][0]["x"] if g["lines"] else 0
+        texts = _wrap_chars(g["text"], max(1, int(room // char_w)), g["word_break"])
+        restack_lines(g, texts, [char_w * len(t) for t in texts], g["line_pitch"])
+        for ln in g["lines"]:
+            cmds.append(f"A{max(0, ln['x'])},{ln['y']},0,{font},{mul},{mul},N,{_epl_string(ln['text'])}")
+
+        cmds.append(f"P{quantity}")
+        return "\n".join(cmds) + "\n"
+
+PRINTER_LANGUAGES = {lang.name: lang for lang in (ZPL(), TSPL(), EPL())}
+
+def render_printer_label(
+    language,
+    code,
+    description,
+    label_mm,
+    symbology="Code128",
+    spacing_px=5,
+    font_size=14,
+    position="Bottom",
+    padding_mm=None,
+    dpi=203,
+    quantity=1,
+    gap_mm=2.0,
+    word_break="char",
+    fit_font=False
+):
+    geometry = printer_geometry(
+        code, description, label_mm, symbology, spacing_px, font_size, position, padding_mm, dpi, word_break, fit_font
+    )
+    return PRINTER_LANGUAGES[language].render(geometry, quantity, gap_mm)
+
+# ============================================================
+# BITMAP AT PRINTER RESOLUTION
+# ============================================================
+@tracing.traced("label.bitmap")
+def render_geometry_bitmap(geometry, mode="1", threshold=MONO_THRESHOLD):
+    # One pixel per printer dot. Modules are an integer number of dots and
+    # are only ever replicated (NEAREST at an integer factor), never
+    # resampled, so bar edges stay sharp. mode "1" is what the head prints.
+    g = geometry
+    sym = g["symbol"]
+    work_mode = "RGB" if mode == "RGB" else "L"
+    img = Image.new(work_mode, g["label"], "white")
+    draw = ImageDraw.Draw(img)
+
+    if g["symbology"] == "QR":
+        img.paste(rasterize_modules(sym["matrix"], sym["module"]), (sym["x"], sym["y"]))
+    else:
+        modules = code128_modules(g["code"])
+        row = Image.new("1", (len(modules), 1), 1)
+        row.putdata([0 if m == "1" else 1 for m in modules])
+        img.paste(row.resize((sym["width"], sym["height"]), Image.NEAREST), (sym["x"], sym["y"]))
+        font = load_font(sym["text_size"])
+        draw.text(
+            (sym["x"] + sym["width"] / 2, sym["text_baseline"]),
+            g["code"], font=font, fill="black", anchor="ms"
+        )
+
+    font = load_font(g["font_height"])
+    for ln in g["lines"]:
+        x = ln["x"]
+        if g["text_box"]:
+            bx, bw = g["text_box"]
+            x = round(bx + (bw - safe_text_width(draw, font, ln["text"])) / 2)
+        draw.text((x, ln["y"]), ln["text"], font=font, fill="black")
+
+    img = to_mono(img, threshold) if mode == "1" else img
+    # Tells the PDF writer to place the bitmap at one dot per printer dot
+    # rather than stretching it to its cell (place_form)
+    img.info["printer_dpi"] = g["dpi"]
+    return img
+
+def render_label_bitmap(
+    code,
+    description,
+    label_mm,
+    symbology="Code128",
+    spacing_px=5,
+    font_size=14,
+    position="Bottom",
+    padding_mm=None,
+    dpi=203,
+    mode="1",
+    threshold=MONO_THRESHOLD,
+    word_break="char",
+    fit_font=False
+):
+    # The whole label (padding included) at `dpi`; place it in a cell of
+    # exactly label_mm with no extra padding to print it 1:1
+    geometry = printer_geometry(
+        code, description, label_mm, symbology, spacing_px, font_size, position, padding_mm, dpi, word_break, fit_font
+    )
+    return render_geometry_bitmap(geometry, mode, threshold)
+
+def render_printer_batch(language, items, label_mm, out, dpi=203, padding_mm=None, gap_mm=2.0, spacing_px=5, font_size=14, position="Bottom", word_break="char", fit_font=False):
+    # One label format per distinct row, printed `quantity` times. A row's
+    # own label size (batch "label" column) wins over label_mm.
+    count = 0
+    for item in items:
+        out.write(render_printer_label(
+            language,
+            item["code"],
+            item["description"],
+            item.get("label_mm") or label_mm,
+            item["symbology"],
+            spacing_px=spacing_px,
+            font_size=font_size,
+            position=position,
+            padding_mm=padding_mm,
+            dpi=dpi,
+            quantity=item.get("quantity", 1),
+            gap_mm=gap_mm,
+            word_break=word_break,
+            fit_font=fit_font,
+        ))
+        count += item.get("quantity", 1)
+    return count
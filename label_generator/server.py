@@ -0,0 +1,389 @@
+# ============================================================
+# Label Generator — HTTP rendering service (ASGI)
+# ============================================================
+# Plain ASGI app, no web framework needed. Run with any ASGI server:
+#
+#   uvicorn label_generator.server:app --workers 1
+#
+# POST /labels   one label as PNG or PDF
+#     {"code": "...", "description": "...", "symbology": "Code128",
+#      "format": "png" | "pdf", "label": "38x100", "font_size": 14,
+#      "position": "Bottom", "desc_spacing": 5, "word_break": "char",
+#      "mode": "RGB" | "L" | "1", "threshold": 128, "fit_font": false}
+#     (fit_font shrinks the description font to fit "label"; needs a size)
+# POST /sheets   a whole batch as one PDF
+#     {"items": [{"code", "description", "symbology", "quantity"}, ...],
+#      "paper": "A4", "label": "38x100" | "auto", "margin": 1 | [t, b, l, r],
+#      "padding": ..., "spacing": 1, "orientation": "Portrait",
+#      "landscape": false, "vector": false, "mode": "1", "fit_font": false, ...}
+# GET  /health
+#
+# Rendering runs on a bounded process pool. Concurrent /labels requests
+# are collected for a few milliseconds and sent to the pool as one task.
+# When more than max_pending requests are queued or rendering, new ones
+# get 503 with Retry-After instead of piling up. A /sheets request may ask
+# for at most MAX_SHEET_LABELS labels in total (the sum of quantities).
+
+import io
+import os
+import json
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+
+from .presets import LABEL_PRESETS, PAPER_PRESETS, lookup_size_mm
+from .symbols import SYMBOLOGIES, ENCODE_ERRORS
+from .text import WORD_BREAKS
+from .compose import render_label, pil_to_bytes, compute_label_mm_from_composed, COLOR_MODES, MONO_THRESHOLD
+from .batch import parse_batch_rows, iter_batch_labels
+from .layout import cell_inner_mm
+from .pdf import generate_pdf_batch, generate_pdf_vector
+
+MAX_BODY_BYTES = 16 * 1024 * 1024
+MAX_SHEET_LABELS = 20000
+SIDES = ["top", "bottom", "left", "right"]
+ITEM_FIELDS = ["code", "description", "symbology", "quantity"]
+
+class BadRequest(Exception):
+    pass
+
+# ============================================================
+# REQUEST PARSING
+# ============================================================
+def _sides(value, default=1.0):
+    if value is None:
+        value = default
+    if isinstance(value, (int, float)):
+        return dict.fromkeys(SIDES, float(value))
+    if isinstance(value, dict):
+        return {k: float(value.get(k, default)) for k in SIDES}
+    if isinstance(value, list) and len(value) == 4:
+        return dict(zip(SIDES, (float(v) for v in value)))
+    raise BadRequest("margin/padding must be a number, [top, bottom, left, right] or an object")
+
+def _compose_options(body):
+    position = body.get("position", "Bottom")
+    if position not in ("Bottom", "Right"):
+        raise BadRequest("position must be Bottom or Right")
+    word_break = body.get("word_break", "char")
+    if word_break not in WORD_BREAKS:
+        raise BadRequest(f"word_break must be one of {WORD_BREAKS}")
+    return {
+        "spacing_px": int(body.get("desc_spacing", 5)),
+        "font_size": int(body.get("font_size", 14)),
+        "position": position,
+        "word_break": word_break,
+    }
+
+def _raster_options(body):
+    mode = body.get("mode", "RGB")
+    if mode not in COLOR_MODES:
+        raise BadRequest(f"mode must be one of {COLOR_MODES}")
+    threshold = int(body.get("threshold", MONO_THRESHOLD))
+    if not 0 <= threshold <= 255:
+        raise BadRequest("threshold must be between 0 and 255")
+    return {"mode": mode, "threshold": threshold}
+
+def _items(rows, default_symbology):
+    if not isinstance(rows, list) or not rows:
+        raise BadRequest("items must be a non-empty list")
+    if not all(isinstance(row, dict) for row in rows):
+        raise BadRequest("each item must be an object")
+    table = [["" if row.get(k) is None else str(row[k]) for k in ITEM_FIELDS] for row in rows]
+    items, errors = parse_batch_rows(ITEM_FIELDS, table, default_symbology)
+    # parse_batch_rows counts the header as line 1 and skips blank rows,
+    # which an API item without a code must not be
+    errors = [{"index": line - 2, "error": msg} for line, msg in errors]
+    seen = {it["line"] - 2 for it in items} | {e["index"] for e in errors}
+    errors += [{"index": i, "error": "Kode kosong"} for i in range(len(rows)) if i not in seen]
+    if errors:
+        raise BadRequest(sorted(errors, key=lambda e: e["index"]))
+    return items
+
+def _size(value, presets, what):
+    try:
+        return lookup_size_mm(str(value), presets)
+    except ValueError as e:
+        raise BadRequest(f"{what}: {e}")
+
+def _fit_font(body, label_mm):
+    fit_font = bool(body.get("fit_font", False))
+    if fit_font and label_mm is None:
+        raise BadRequest("fit_font needs a label size")
+    return fit_font
+
+def parse_label_request(body):
+    symbology = body.get("symbology", "Code128")
+    if symbology not in SYMBOLOGIES:
+        raise BadRequest(f"symbology must be one of {SYMBOLOGIES}")
+    fmt = body.get("format", "png").lower()
+    if fmt not in ("png", "pdf"):
+        raise BadRequest("format must be png or pdf")
+    label = body.get("label", "auto")
+    label_mm = None if str(label).lower() == "auto" else _size(label, LABEL_PRESETS, "label")
+    return {
+        "item": _items([dict(body, symbology=symbology, quantity=1)], symbology)[0],
+        "compose": _compose_options(body),
+        "raster": _raster_options(body),
+        "format": fmt,
+        "label_mm": label_mm,
+        # The PDF page is the label itself, without padding
+        "fit_mm": label_mm if _fit_font(body, label_mm) else None,
+    }
+
+def parse_sheet_request(body):
+    symbology = body.get("symbology", "Code128")
+    if symbology not in SYMBOLOGIES:
+        raise BadRequest(f"symbology must be one of {SYMBOLOGIES}")
+    label = body.get("label", "auto")
+    orientation = body.get("orientation", "Portrait")
+    if orientation not in ("Portrait", "Landscape"):
+        raise BadRequest("orientation must be Portrait or Landscape")
+    label_mm = None if str(label).lower() == "auto" else _size(label, LABEL_PRESETS, "label")
+    items = _items(body.get("items"), symbology)
+    # A few rows with a huge quantity would otherwise hold a pool worker
+    # (and a PDF in memory) for as long as they take
+    total = sum(it["quantity"] for it in items)
+    if total > MAX_SHEET_LABELS:
+        raise BadRequest(f"too many labels: {total} (at most {MAX_SHEET_LABELS} per sheet request)")
+    return {
+        "items": items,
+        "compose": _compose_options(body),
+        "raster": _raster_options(body),
+        "paper_mm": _size(body.get("paper", "A4"), PAPER_PRESETS, "paper"),
+        "label_mm": label_mm,
+        "fit_font": _fit_font(body, label_mm),
+        "margins": _sides(body.get("margin")),
+        "padding": _sides(body.get("padding")),
+        "spacing": float(body.get("spacing", 1.0)),
+        "orientation": orientation,
+        "landscape": bool(body.get("landscape", False)),
+        "vector": bool(body.get("vector", False)),
+    }
+
+# ============================================================
+# WORKER TASKS (run in the process pool)
+# ============================================================
+def render_label_payloads(requests):
+    # One task for a micro-batch of /labels requests
+    out = []
+    for req in requests:
+        item = req["item"]
+        try:
+            img = render_label(
+                item["code"], item["description"], item["symbology"], **req["compose"], **req["raster"],
+                fit_mm=req["fit_mm"]
+            )
+            if req["format"] == "png":
+                out.append((pil_to_bytes(img), "image/png"))
+                continue
+            # A single label on a page of its own size
+            no_margin = dict.fromkeys(SIDES, 0.0)
+            label_mm = req["label_mm"] or compute_label_mm_from_composed(
+                img, (1000, 1000), no_margin, 0, "Portrait"
+            )
+            buf, _, _ = generate_pdf_batch([img], label_mm, label_mm, no_margin, 0, no_margin)
+            out.append((buf.getvalue(), "application/pdf"))
+        except (ValueError, *ENCODE_ERRORS) as e:
+            # Input the renderer refuses; anything else is a bug and fails
+            # the batch with a 500
+            out.append((str(e), None))
+    return out
+
+def render_sheet_pdf(req):
+    items, compose, raster = req["items"], req["compose"], req["raster"]
+    label_mm = req["label_mm"]
+    if label_mm is None:
+        first = render_label(items[0]["code"], items[0]["description"], items[0]["symbology"], **compose, **raster)
+        label_mm = compute_label_mm_from_composed(
+            first, req["paper_mm"], req["margins"], req["spacing"], req["orientation"]
+        )
+    layout_args = (
+        label_mm, req["paper_mm"], req["margins"], req["spacing"], req["padding"],
+        req["orientation"], req["landscape"]
+    )
+    buf = io.BytesIO()
+    if req["vector"]:
+        generate_pdf_vector(items, *layout_args, **compose, fit_font=req["fit_font"], out=buf)
+    else:
+        fit_mm = cell_inner_mm(label_mm, req["padding"], req["orientation"]) if req["fit_font"] else None
+        generate_pdf_batch(iter_batch_labels(items, **compose, **raster, fit_mm=fit_mm, encode=True), *layout_args, out=buf)
+    # The finished PDF goes back to the event loop whole and is sent as one body
+    return buf.getvalue()
+
+# ============================================================
+# ASGI APP
+# ============================================================
+class LabelService:
+    def __init__(self, workers=None, max_pending=256, batch_size=32, batch_window_ms=5):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.batch_window = batch_window_ms / 1000.0
+        self.pending = 0
+        self._pool = None
+        self._queue = None
+        self._batcher = None
+
+    # --------------------------------------------------------
+    # lifecycle
+    # --------------------------------------------------------
+    def start(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            self._queue = asyncio.Queue()
+            self._batcher = asyncio.get_running_loop().create_task(self._run_batcher())
+
+    async def stop(self):
+        if self._batcher is not None:
+            self._batcher.cancel()
+            self._batcher = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self.start()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.stop()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    # --------------------------------------------------------
+    # micro-batching
+    # --------------------------------------------------------
+    async def _run_batcher(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            task = loop.run_in_executor(self._pool, render_label_payloads, [req for req, _ in batch])
+            task.add_done_callback(lambda t, batch=batch: self._deliver(t, batch))
+
+    @staticmethod
+    def _deliver(task, batch):
+        error = asyncio.CancelledError() if task.cancelled() else task.exception()
+        if error is not None:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(error)
+            return
+        for (_, fut), result in zip(batch, task.result()):
+            if not fut.done():
+                fut.set_result(result)
+
+    async def render_label(self, req):
+        fut = asyncio.get_running_loop().create_future()
+        await self._queue.put((req, fut))
+        return await fut
+
+    async def render_sheet(self, req):
+        return await asyncio.get_running_loop().run_in_executor(self._pool, render_sheet_pdf, req)
+
+    # --------------------------------------------------------
+    # HTTP
+    # --------------------------------------------------------
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        self.start()
+
+        route = (scope["method"], scope["path"].rstrip("/") or "/")
+        if route == ("GET", "/health"):
+            await _send_json(send, 200, {"status": "ok", "pending": self.pending, "workers": self.workers})
+            return
+        if route not in (("POST", "/labels"), ("POST", "/sheets")):
+            await _send_json(send, 404, {"error": "not found"})
+            return
+
+        if self.pending >= self.max_pending:
+            await _send_json(send, 503, {"error": "busy, retry later"}, [(b"retry-after", b"1")])
+            return
+
+        self.pending += 1
+        try:
+            body = await _read_json(receive)
+            if route[1] == "/labels":
+                payload, mime = await self.render_label(_parse(parse_label_request, body))
+                if mime is None:
+                    raise BadRequest(payload)
+            else:
+                payload, mime = await self.render_sheet(_parse(parse_sheet_request, body)), "application/pdf"
+        except BadRequest as e:
+            await _send_json(send, 400, {"error": e.args[0]})
+            return
+        except (ValueError, *ENCODE_ERRORS) as e:
+            # _items already rejects codes the symbology can't encode, with
+            # their index; anything the renderer still refuses is bad input too
+            await _send_json(send, 400, {"error": str(e)})
+            return
+        except Exception:
+            await _send_json(send, 500, {"error": "internal error"})
+            raise
+        finally:
+            self.pending -= 1
+
+        await _send_bytes(send, 200, payload, mime)
+
+def _parse(parse, body):
+    # Values of the wrong type or format (int("x"), float([1])) are the
+    # client's mistake, not the renderer's
+    try:
+        return parse(body)
+    except (ValueError, TypeError) as e:
+        raise BadRequest(str(e))
+
+async def _read_json(receive):
+    chunks, size = [], 0
+    while True:
+        message = await receive()
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > MAX_BODY_BYTES:
+            raise BadRequest("request body too large")
+        chunks.append(chunk)
+        if not message.get("more_body"):
+            break
+    try:
+        body = json.loads(b"".join(chunks) or b"{}")
+    except ValueError:
+        raise BadRequest("body must be JSON")
+    if not isinstance(body, dict):
+        raise BadRequest("body must be a JSON object")
+    return body
+
+async def _send_bytes(send, status, payload, mime, headers=()):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", mime.encode()),
+            (b"content-length", str(len(payload)).encode()),
+            *headers,
+        ],
+    })
+    await send({"type": "http.response.body", "body": payload})
+
+async def _send_json(send, status, data, headers=()):
+    await _send_bytes(send, status, json.dumps(data).encode(), "application/json", headers)
+
+app = LabelService(
+    workers=int(os.environ.get("LABEL_SERVER_WORKERS", 0)) or None,
+    max_pending=int(os.environ.get("LABEL_SERVER_MAX_PENDING", 256)),
+    batch_size=int(os.environ.get("LABEL_SERVER_BATCH_SIZE", 32)),
+    batch_window_ms=float(os.environ.get("LABEL_SERVER_BATCH_WINDOW_MS", 5)),
+)
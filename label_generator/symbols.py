@@ -0,0 +1,199 @@
+# ============================================================
+# Label Generator — barcode symbols
+# ============================================================
+
+import os
+import json
+import hashlib
+import collections
+import numpy as np
+import qrcode
+import barcode
+from barcode.errors import BarcodeError
+from barcode.writer import ImageWriter, mm2px
+from qrcode.exceptions import DataOverflowError
+from PIL import Image, ImageDraw
+
+from . import tracing
+
+# ============================================================
+# BARCODE GENERATORS
+# ============================================================
+def rasterize_modules(matrix, box_size=10):
+    # Boolean module matrix (True = dark) to a 1-bit image with box_size px
+    # per module, scaled up in one array operation instead of one
+    # rectangle per module
+    dark = np.asarray(matrix, dtype=bool)
+    return Image.fromarray(~dark.repeat(box_size, axis=0).repeat(box_size, axis=1))
+
+def generate_qr(data: str, box_size=10, border=2):
+    return rasterize_modules(qr_matrix(data, border=border), box_size)
+
+class RasterWriter(ImageWriter):
+    # Same image as ImageWriter, without painting every module as its own
+    # full-height rectangle: the bars are drawn once on a 1 px high row,
+    # which is stretched to the bar height. render() returns the PIL image,
+    # so nothing is encoded to PNG and decoded again. It relies on
+    # ImageWriter internals (_init, _image, _paint_text, _finish), so
+    # python-barcode is pinned in requirements.txt.
+    def render(self, code):
+        self._init(code)
+        width = self._image.width
+        # Mask of the bars: 1 where a module is dark
+        row = Image.new("1", (width, 1), 0)
+        draw = ImageDraw.Draw(row)
+
+        xpos = self.quiet_zone
+        for mod, _ in self.packed(code[0]):
+            w = self.module_width * abs(mod)
+            if mod > 0:
+                # Same pixel edges as ImageWriter._paint_module
+                draw.rectangle([(mm2px(xpos, self.dpi), 0), (mm2px(xpos + w, self.dpi) - 1, 0)], fill=1)
+            xpos += w
+        text_x = self.quiet_zone + (xpos - self.quiet_zone) / 2
+
+        top = int(mm2px(self.margin_top, self.dpi))
+        bottom = int(mm2px(self.margin_top + self.module_height, self.dpi))
+        bars = row.resize((width, bottom - top + 1), Image.NEAREST)
+        self._image.paste(self.foreground, (0, top), bars)
+
+        if self.text:
+            self._paint_text(text_x, self.margin_top + self.module_height + self.text_distance)
+        return self._finish()
+
+def generate_code128(data: str, writer_options=None, mode="RGB"):
+    CODE128 = barcode.get_barcode_class("code128")
+    return CODE128(data, writer=RasterWriter(mode=mode)).render(writer_options)
+
+SYMBOLOGIES = ["Code128", "QR"]
+
+# Raised by the encoders for data a symbology can't hold
+ENCODE_ERRORS = (BarcodeError, DataOverflowError)
+
+def check_symbol_data(symbology, data: str):
+    # Raises one of ENCODE_ERRORS if data can't be encoded, without drawing
+    # anything, so bad input is caught before a batch starts rendering
+    if symbology == "QR":
+        qr = qrcode.QRCode()
+        qr.add_data(data)
+        try:
+            qr.best_fit()
+        except ValueError:
+            # qrcode reports data past version 40 as an invalid version
+            raise DataOverflowError(f"data too long for QR ({len(data)} characters)")
+    else:
+        code128_modules(data)
+
+# ============================================================
+# SYMBOL CACHE
+# ============================================================
+def image_nbytes(img):
+    # Size of the pixel data, as len(img.tobytes()) without the copy
+    if img.mode == "1":
+        return (img.width + 7) // 8 * img.height
+    return img.width * img.height * len(img.getbands()) * (2 if img.mode.startswith("I;16") else 1)
+
+class SymbolCache:
+    # Rendered symbols keyed by a digest of (symbology, data, options).
+    # Kept in memory with LRU eviction and, if disk_dir is set, as PNG files
+    # shared between processes and runs. Cached images must not be modified.
+    # The memory part is bounded by entries and by pixel bytes: a Code128
+    # symbol at 300 dpi is 250-750 KiB, and every worker process has its
+    # own cache.
+    def __init__(self, maxsize=1024, max_bytes=32 * 1024 * 1024, disk_dir=None):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.hits = 0
+        self.misses = 0
+        self.nbytes = 0
+        self._items = collections.OrderedDict()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    @staticmethod
+    def key(symbology, data, options):
+        raw = json.dumps([symbology, data, options], sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.disk_dir, key[:2], key + ".png")
+
+    def get(self, key):
+        img = self._items.get(key)
+        if img is not None:
+            self._items.move_to_end(key)
+            self.hits += 1
+            return img
+
+        if self.disk_dir and os.path.exists(self._path(key)):
+            try:
+                img = Image.open(self._path(key))
+                img.load()
+            except OSError:
+                img = None
+            if img is not None:
+                self._remember(key, img)
+                self.hits += 1
+                return img
+
+        self.misses += 1
+        return None
+
+    def put(self, key, img):
+        img.load()
+        self._remember(key, img)
+        if self.disk_dir:
+            path = self._path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            img.save(tmp, "PNG")
+            os.replace(tmp, path)
+
+    def _remember(self, key, img):
+        old = self._items.pop(key, None)
+        if old is not None:
+            self.nbytes -= image_nbytes(old)
+        self._items[key] = img
+        self.nbytes += image_nbytes(img)
+        while len(self._items) > 1 and (len(self._items) > self.maxsize or self.nbytes > self.max_bytes):
+            _, evicted = self._items.popitem(last=False)
+            self.nbytes -= image_nbytes(evicted)
+
+    def clear(self):
+        self._items.clear()
+        self.hits = self.misses = self.nbytes = 0
+
+symbol_cache = SymbolCache(
+    max_bytes=int(float(os.environ.get("LABEL_SYMBOL_CACHE_MB", 32)) * 1024 * 1024),
+    disk_dir=os.environ.get("LABEL_SYMBOL_CACHE_DIR") or None,
+)
+
+def generate_symbol(symbology, data: str, cache=symbol_cache, **options):
+    # options go to generate_qr (box_size, border) or generate_code128 (writer_options, mode)
+    key = SymbolCache.key(symbology, data, options) if cache is not None else None
+    if key is not None:
+        img = cache.get(key)
+        if img is not None:
+            return img
+
+    with tracing.span("symbol.encode", symbology=symbology, chars=len(data)):
+        if symbology == "QR":
+            img = generate_qr(data, **options)
+        else:
+            img = generate_code128(data, **options)
+
+    if key is not None:
+        cache.put(key, img)
+    return img
+
+# Raw module patterns, used to draw symbols as vectors
+def code128_modules(data: str):
+    CODE128 = barcode.get_barcode_class("code128")
+    return CODE128(data).build()[0]
+
+def qr_matrix(data: str, border=2):
+    qr = qrcode.QRCode(border=border)
+    qr.add_data(data)
+    qr.make(fit=True)
+    return qr.get_matrix()
@@ -0,0 +1,148 @@
+# ============================================================
+# Label Generator — fonts, measurement & text wrap
+# ============================================================
+
+import os
+from bisect import bisect_right
+from itertools import accumulate
+from functools import lru_cache
+from PIL import ImageFont
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+FONT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Roboto-Regular.ttf")
+FONT_CACHE_SIZE = 128
+ADVANCE_CACHE_SIZE = 65536
+
+# What happens to a word wider than the wrap width: "none" lets it
+# overflow (the label grows), "char" breaks it between characters,
+# "hyphen" does the same with a "-" at each break, "ellipsis" cuts it
+# short with "...". Marks are ASCII so printer fonts can draw them.
+WORD_BREAKS = ["none", "char", "hyphen", "ellipsis"]
+BREAK_MARKS = {"none": "", "char": "", "hyphen": "-", "ellipsis": "..."}
+
+# ============================================================
+# FONTS & MEASUREMENT
+# ============================================================
+def safe_text_height(font, text="A"):
+    try:
+        bbox = font.getbbox(text)
+        return bbox[3] - bbox[1]
+    except:
+        return font.getsize(text)[1]
+
+def safe_text_width(draw, font, text):
+    try:
+        return draw.textlength(text, font=font)
+    except:
+        return draw.textsize(text, font=font)[0]
+
+
+
+# Fonts are parsed once per (path, size, variant) and shared by composition,
+# text wrapping and the vector PDF path. variant is the TrueType face index,
+# or "pdf" for the name of the font registered with ReportLab.
+@lru_cache(maxsize=FONT_CACHE_SIZE)
+def _cached_font(path, size, variant):
+    if variant == "pdf":
+        name = os.path.splitext(os.path.basename(path))[0]
+        try:
+            pdfmetrics.registerFont(TTFont(name, path))
+            return name
+        except:
+            return "Helvetica"
+    try:
+        return ImageFont.truetype(path, size, index=variant)
+    except:
+        return ImageFont.load_default()
+
+def load_font(size=16, path=FONT_PATH, variant=0):
+    return _cached_font(path, size, variant)
+
+def load_pdf_font(path=FONT_PATH):
+    return _cached_font(path, 0, "pdf")
+
+def font_cache_info():
+    # CacheInfo(hits, misses, maxsize, currsize)
+    return _cached_font.cache_info()
+
+# Advance widths of words by (font, draw.fontmode, word). Descriptions in a
+# batch share most of their words, so after the first labels wrapping is
+# almost all dict lookups. fontmode is part of the key because 1-bit
+# drawing hints glyphs differently. Oldest entries go first when full.
+_advances = {}
+
+def text_advance(draw, font, text):
+    key = (font, getattr(draw, "fontmode", None), text)
+    width = _advances.get(key)
+    if width is None:
+        width = safe_text_width(draw, font, text)
+        if len(_advances) >= ADVANCE_CACHE_SIZE:
+            del _advances[next(iter(_advances))]
+        _advances[key] = width
+    return width
+
+# ============================================================
+# TEXT WRAP
+# ============================================================
+def break_word(draw, font, word, max_width_px, word_break="char"):
+    # Splits a word wider than max_width_px into [(piece, width), ...].
+    # Each break point is a binary search over the word's cumulative glyph
+    # advances (every character measured once, cached), not a re-measure
+    # of ever longer prefixes. A piece always keeps at least one character.
+    mark = BREAK_MARKS[word_break]
+    mark_px = text_advance(draw, font, mark) if mark else 0
+    ends = list(accumulate(text_advance(draw, font, ch) for ch in word))
+
+    pieces, start, base = [], 0, 0
+    while ends[-1] - base > max_width_px:
+        end = max(start + 1, bisect_right(ends, base + max_width_px - mark_px, lo=start))
+        if end == len(word):
+            break
+        pieces.append((word[start:end] + mark, ends[end - 1] - base + mark_px))
+        if word_break == "ellipsis":
+            return pieces
+        start, base = end, ends[end - 1]
+    pieces.append((word[start:], ends[-1] - base))
+    return pieces
+
+def wrap_text_with_widths(draw, font, text, max_width_px, word_break="char"):
+    # Greedy word wrap in one pass: every word and the space are measured
+    # once (and cached), and a line's width is the running sum of them
+    # instead of a re-measure of the whole line per added word. Returns
+    # (lines, widths). Glyph advances add up exactly with Pillow's basic
+    # layout; with Raqm kerning around spaces may shift a width by a pixel.
+    # A word too wide for a line of its own is handled per word_break
+    # (WORD_BREAKS) and starts on a new line.
+    words = text.split()
+    if not words:
+        return [], []
+
+    space = text_advance(draw, font, " ")
+    lines, widths = [], []
+    current, width = [], 0
+
+    for w in words:
+        w_px = text_advance(draw, font, w)
+        if current and width + space + w_px <= max_width_px:
+            current.append(w)
+            width += space + w_px
+            continue
+
+        if current:
+            lines.append(" ".join(current))
+            widths.append(width)
+        current, width = [w], w_px
+        if w_px > max_width_px and word_break != "none":
+            pieces = break_word(draw, font, w, max_width_px, word_break)
+            for piece, piece_px in pieces[:-1]:
+                lines.append(piece)
+                widths.append(piece_px)
+            current, width = [pieces[-1][0]], pieces[-1][1]
+
+    lines.append(" ".join(current))
+    widths.append(width)
+    return lines, widths
+
+def wrap_text_to_width(draw, font, text, max_width_px, word_break="char"):
+    return wrap_text_with_widths(draw, font, text, max_width_px, word_break)[0]
@@ -0,0 +1,179 @@
+# ============================================================
+# Label Generator — per-stage timing
+# ============================================================
+# Spans around the pipeline stages (symbol encoding, barcode resize, text
+# wrap, PNG encoding, PDF drawing) so a slow run shows where its time goes.
+#
+#   with tracing.recording() as records:      # list of dicts
+#       generate_pdf_batch(...)
+#   print(tracing.summarize(records))
+#
+#   exporter = tracing.JsonLinesExporter("trace.jsonl")
+#   tracing.add_hook(exporter) ... tracing.remove_hook(exporter); exporter.close()
+#
+# A record is {"name", "ms", "ts", ...fields}: ms is the span's duration
+# (absent for events), fields are the span's own (bytes, count, ...) plus
+# those of the enclosing context() blocks (line, page, ...). Spans nest:
+# label.compose includes its text.wrap, pdf.draw the pdf.embed of a
+# label's first use, so totals of different names overlap.
+#
+# With no hook added, span() and context() return one shared object that
+# does nothing: no clock reads, no allocation beyond the call itself.
+
+import json
+import time
+import functools
+import contextlib
+import contextvars
+
+_hooks = []
+_context = contextvars.ContextVar("label_generator_trace_context", default={})
+
+# ============================================================
+# HOOKS
+# ============================================================
+def add_hook(hook):
+    # hook(record) is called for every finished span and every event
+    _hooks.append(hook)
+
+def remove_hook(hook):
+    _hooks.remove(hook)
+
+def enabled():
+    return bool(_hooks)
+
+def _emit(record):
+    fields = _context.get()
+    if fields:
+        record = {**fields, **record}
+    for hook in tuple(_hooks):
+        hook(record)
+
+def replay(records):
+    # Hand records taken elsewhere (a worker process) to this process' hooks
+    if _hooks:
+        for record in records:
+            _emit(record)
+
+# ============================================================
+# SPANS, EVENTS & CONTEXT
+# ============================================================
+class Span:
+    __slots__ = ("name", "fields", "_t0")
+
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = fields
+
+    def set(self, **fields):
+        # Fields known only once the work is done (output bytes, line count)
+        self.fields.update(fields)
+
+    def __enter__(self):
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        ms = (time.perf_counter() - self._t0) * 1000
+        record = {"name": self.name, "ms": ms, "ts": time.time(), **self.fields}
+        if exc_type is not None:
+            record["error"] = exc_type.__name__
+        _emit(record)
+        return False
+
+class _Context:
+    __slots__ = ("fields", "_token")
+
+    def __init__(self, fields):
+        self.fields = fields
+
+    def __enter__(self):
+        self._token = _context.set({**_context.get(), **self.fields})
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _context.reset(self._token)
+        return False
+
+class _Disabled:
+    __slots__ = ()
+
+    def set(self, **fields):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_DISABLED = _Disabled()
+
+def span(name, **fields):
+    if not _hooks:
+        return _DISABLED
+    return Span(name, fields)
+
+def event(name, **fields):
+    # A point record without duration, e.g. a finished page and its labels
+    if _hooks:
+        _emit({"name": name, "ts": time.time(), **fields})
+
+def context(**fields):
+    # Fields added to every record inside the block (line, page, ...)
+    if not _hooks:
+        return _DISABLED
+    return _Context(fields)
+
+def traced(name):
+    # Decorator: the whole call is one span
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _hooks:
+                return fn(*args, **kwargs)
+            with Span(name, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+# ============================================================
+# COLLECTING & EXPORT
+# ============================================================
+@contextlib.contextmanager
+def recording():
+    records = []
+    add_hook(records.append)
+    try:
+        yield records
+    finally:
+        remove_hook(records.append)
+
+class JsonLinesExporter:
+    # One JSON object per line; `out` is a path or a text file object
+    def __init__(self, out):
+        self._own = isinstance(out, str)
+        self._f = open(out, "w", encoding="utf-8") if self._own else out
+
+    def __call__(self, record):
+        self._f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+    def close(self):
+        if self._own:
+            self._f.close()
+        else:
+            self._f.flush()
+
+def summarize(records):
+    # {name: {"count", "total_ms", "mean_ms", "max_ms", "bytes"}}, slowest first
+    stats = {}
+    for r in records:
+        s = stats.setdefault(r["name"], {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "bytes": 0})
+        s["count"] += 1
+        s["bytes"] += r.get("bytes", 0)
+        if "ms" in r:
+            s["total_ms"] += r["ms"]
+            s["max_ms"] = max(s["max_ms"], r["ms"])
+    for s in stats.values():
+        s["mean_ms"] = s["total_ms"] / s["count"]
+    return dict(sorted(stats.items(), key=lambda kv: -kv[1]["total_ms"]))
@@ -4,15 +4,36 @@
 # ============================================================
 
 import streamlit as st
-import qrcode
-import barcode
-from barcode.writer import ImageWriter
-from PIL import Image, ImageDraw, ImageFont
-import io
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import mm as mm_unit
-from reportlab.lib.utils import ImageReader
-import base64
+import os
+import time
+
+from label_generator import (
+    LABEL_PRESETS,
+    PAPER_PRESETS,
+    SYMBOLOGIES,
+    MONO_THRESHOLD,
+    pil_to_bytes,
+    render_label,
+    compute_label_mm_from_composed,
+    read_batch_table,
+    parse_batch_rows,
+    iter_batch_labels,
+    plan_sized_labels,
+    iter_owned_labels,
+    compute_page_grid_pt,
+    generate_pdf,
+    generate_pdf_batch,
+    generate_pdf_vector,
+    generate_pdf_packed,
+    pdf_xobject_counts,
+    image_digest,
+    generate_pdf_preview,
+    cell_inner_mm,
+    PRINTER_DPIS,
+    PRINTER_LANGUAGES,
+    render_printer_label,
+    render_label_bitmap,
+)
 
 # ============================================================
 # CONFIG
@@ -20,284 +41,52 @@ import base64
 st.set_page_config(layout="wide")
 st.title("Label Generator")
 
-PX_PER_MM = 96.0 / 25.4  # ~3.7795 px per mm
-
-# ============================================================
-# UTILITIES
-# ============================================================
-def safe_text_height(font, text="A"):
-    try:
-        bbox = font.getbbox(text)
-        return bbox[3] - bbox[1]
-    except:
-        return font.getsize(text)[1]
-
-def safe_text_width(draw, font, text):
-    try:
-        return draw.textlength(text, font=font)
-    except:
-        return draw.textsize(text, font=font)[0]
-
-
-
-def load_font(size=16):
-    try:
-        return ImageFont.truetype("Roboto-Regular.ttf", size)
-    except:
-        return ImageFont.load_default()
-
-
-
-
-def pil_to_bytes(img: Image.Image, fmt="PNG"):
-    buf = io.BytesIO()
-    img.save(buf, format=fmt)
-    buf.seek(0)
-    return buf.getvalue()
-
-# ============================================================
-# BARCODE GENERATORS
-# ============================================================
-def generate_qr(data: str):
-    qr = qrcode.QRCode(box_size=10, border=2)
-    qr.add_data(data)
-    qr.make(fit=True)
-    return qr.make_image(fill_color="black", back_color="white")
-
-def generate_code128(data: str):
-    CODE128 = barcode.get_barcode_class("code128")
-    c128 = CODE128(data, writer=ImageWriter())
-    buffer = io.BytesIO()
-    c128.write(buffer)
-    buffer.seek(0)
-    return Image.open(buffer)
-
-# ============================================================
-# PRESETS
-# ============================================================
-LABEL_PRESETS = {
-    "38×100 mm": (38, 100),
-    "50×100 mm": (50, 100),
-    "32×64 mm": (32, 64),
-    "18×50 mm": (18, 50),
-    "13×38 mm": (13, 38),
-    "8×20 mm": (8, 20),
-    "38×75 mm": (38, 75),
-    "11×30 mm": (11, 30),
-}
-
-PAPER_PRESETS = {
-    "A3": (297, 420),
-    "A4": (210, 297),
-    "A5": (148, 210),
-    "4R (102×152 mm)": (102, 152),
-    "4R (102×102 mm)": (102, 102),
-    "26 × 15 mm": (26, 15),
-    "33 × 15 mm": (33, 15),
-    "33 × 25 mm": (33, 25),
-    "48 × 33 mm": (48, 33),
-    "60 × 30 mm": (60, 30),
-    "76 × 35 mm": (76, 35),
-    "100 × 50 mm": (100, 50),
-}
-
-# ============================================================
-# TEXT WRAP
-# ============================================================
-def wrap_text_to_width(draw, font, text, max_width_px):
-    words = text.split()
-    if not words:
-        return []
-
-    lines = []
-    current = words[0]
-
-    for w in words[1:]:
-        test = current + " " + w
-        if safe_text_width(draw, font, test) <= max_width_px:
-            current = test
-        else:
-            lines.append(current)
-            current = w
-
-    lines.append(current)
-    return lines
-
-# ============================================================
-# COMPOSE LABEL IMAGE
-# ============================================================
-def compose_label_image_wrapped(
-    barcode_img,
-    description,
-    spacing_px=5,
-    font_size=14,
-    target_barcode_width_px=420,
-    bg_color="white",
-    position="Bottom"
-):
-    desc = " ".join(description.split())
-    font = load_font(font_size)
-
-    # Resize barcode
-    bc = barcode_img.copy().convert("RGB")
-    if bc.width > target_barcode_width_px:
-        scale = target_barcode_width_px / bc.width
-        bc = bc.resize((int(bc.width * scale), int(bc.height * scale)), Image.LANCZOS)
-
-    bw, bh = bc.size
-
-    tmp = Image.new("RGB", (max(bw, 500), 500), "white")
-    draw_tmp = ImageDraw.Draw(tmp)
-
-    wrap_width = int(bw * 0.95) if position == "Bottom" else int((bw * 0.7))
-    lines = wrap_text_to_width(draw_tmp, font, desc, wrap_width) if desc else []
-
-    line_h = safe_text_height(font)
-    desc_h = len(lines) * (line_h + 2)
-    desc_w = max((safe_text_width(draw_tmp, font, ln) for ln in lines), default=0)
-    pad = 8
-
-    if position == "Bottom":
-        canvas_w = int(max(bw, desc_w) + pad * 2)
-        canvas_h = int(bh + desc_h + spacing_px + pad * 2)
-        out = Image.new("RGB", (canvas_w, canvas_h), bg_color)
-        draw = ImageDraw.Draw(out)
-
-        out.paste(bc, (int((canvas_w - bw)/2), pad))
-        y = pad + bh + spacing_px
-        for ln in lines:
-            w_ln = safe_text_width(draw, font, ln)
-            x_ln = int((canvas_w - w_ln)/2)
-            draw.text((x_ln, y), ln, font=font, fill="black")
-            y += line_h + 2
-        return out
-
-    else:  # RIGHT
-        canvas_w = int(bw + spacing_px + desc_w + pad * 2)
-        canvas_h = int(max(bh, desc_h) + pad * 2)
-        out = Image.new("RGB", (canvas_w, canvas_h), bg_color)
-        draw = ImageDraw.Draw(out)
-
-        x_bc = pad
-        y_bc = pad + int((canvas_h - pad*2 - bh)/2)
-        out.paste(bc, (x_bc, y_bc))
-
-        x_desc = pad + bw + spacing_px
-        y_desc = pad + int((canvas_h - pad*2 - desc_h)/2)
-        for ln in lines:
-            draw.text((x_desc, y_desc), ln, font=font, fill="black")
-            y_desc += line_h + 2
-        return out
-
-# ============================================================
-# AUTO-FIT SIZE CALCULATION
-# ============================================================
-def compute_label_mm_from_composed(img, paper_mm, margins, spacing_mm, orientation):
-    w_mm = img.width / PX_PER_MM + 4
-    h_mm = img.height / PX_PER_MM + 4
-    if orientation == "Landscape":
-        w_mm, h_mm = h_mm, w_mm
-
-    usable_w = paper_mm[0] - margins["left"] - margins["right"]
-    usable_h = paper_mm[1] - margins["top"] - margins["bottom"]
-
-    w_mm = min(w_mm, max(5, usable_w - spacing_mm))
-    h_mm = min(h_mm, max(5, usable_h - spacing_mm))
-
-    return round(w_mm, 1), round(h_mm, 1)
-
 # ============================================================
-# PDF & PREVIEW FUNCTIONS
+# CACHED IMAGE WORK
 # ============================================================
-def generate_pdf(label_img, label_mm, paper_mm, margins_mm, spacing_mm, padding_mm, label_orientation="Portrait", page_landscape=False):
-    lw, lh = label_mm
-    if label_orientation=="Landscape": lw, lh = lh, lw
-    pw, ph = paper_mm
-    if page_landscape: pw, ph = ph, pw
-
-    lw_pt, lh_pt = lw * mm_unit, lh * mm_unit
-    pw_pt, ph_pt = pw * mm_unit, ph * mm_unit
-    m = {k: margins_mm[k]*mm_unit for k in margins_mm}
-    p = {k: padding_mm[k]*mm_unit for k in padding_mm}
-    spacing_pt = spacing_mm*mm_unit
-
-    buf = io.BytesIO()
-    pdf = canvas.Canvas(buf, pagesize=(pw_pt, ph_pt))
-
-    img_buf = io.BytesIO()
-    label_img.save(img_buf, "PNG")
-    img_buf.seek(0)
-    img_reader = ImageReader(img_buf)
-
-    usable_w = pw_pt - m["left"] - m["right"]
-    usable_h = ph_pt - m["top"] - m["bottom"]
-    cols = max(1, int((usable_w + spacing_pt)//(lw_pt + spacing_pt)))
-    rows = max(1, int((usable_h + spacing_pt)//(lh_pt + spacing_pt)))
-
-    start_x = m["left"]
-    start_y = ph_pt - m["top"] - lh_pt
-
-    for r in range(rows):
-        for c in range(cols):
-            x = start_x + c*(lw_pt + spacing_pt)
-            y = start_y - r*(lh_pt + spacing_pt)
-            pdf.drawImage(
-                img_reader,
-                x + p["left"],
-                y + p["bottom"],
-                lw_pt - (p["left"] + p["right"]),
-                lh_pt - (p["top"] + p["bottom"]),
-                preserveAspectRatio=True,
-                anchor="sw"
-            )
-
-    pdf.showPage()
-    pdf.save()
-    buf.seek(0)
-    return buf
-
-def generate_pdf_preview(label_img, label_mm, paper_mm, margins_mm, spacing_mm, padding_mm, label_orientation="Portrait", max_px=900, page_landscape=False):
-    lw, lh = label_mm
-    if label_orientation=="Landscape": lw, lh = lh, lw
-    pw, ph = paper_mm
-    if page_landscape: pw, ph = ph, pw
-
-    scale = max_px/max(pw, ph)
-    scale = min(max(scale, 2), 12)
-
-    def mm_to_px(mm): return int(round(mm*scale))
-    pw_px, ph_px = mm_to_px(pw), mm_to_px(ph)
-    lw_px, lh_px = mm_to_px(lw), mm_to_px(lh)
-    mt, mb, ml, mr = (mm_to_px(margins_mm[k]) for k in ["top","bottom","left","right"])
-    pt, pb, pl, pr = (mm_to_px(padding_mm[k]) for k in ["top","bottom","left","right"])
-    sp = mm_to_px(spacing_mm)
-
-    preview = Image.new("RGB", (pw_px, ph_px), "white")
-    draw = ImageDraw.Draw(preview)
-
-    li = label_img.copy().convert("RGB")
-    li.thumbnail((lw_px - pl - pr, lh_px - pt - pb))
-
-    usable_w = pw_px - ml - mr
-    usable_h = ph_px - mt - mb
-    cols = max(1, (usable_w + sp)//(lw_px + sp))
-    rows = max(1, (usable_h + sp)//(lh_px + sp))
-
-    for r in range(rows):
-        for c in range(cols):
-            x = ml + c*(lw_px + sp)
-            y = mt + r*(lh_px + sp)
+# Every widget change reruns this script. Image work is keyed on the label
+# digest plus the layout inputs, so a rerun that changes none of them only
+# does dictionary lookups. Arguments starting with "_" are not hashed.
+@st.cache_resource(max_entries=64)
+def cached_render_label(code, description, symbology, spacing_px, font_size, position, mode, threshold, word_break, fit_mm):
+    # Shared, not copied: the label image is never modified afterwards
+    img = render_label(
+        code,
+        description,
+        symbology,
+        spacing_px=spacing_px,
+        font_size=font_size,
+        position=position,
+        mode=mode,
+        threshold=threshold,
+        word_break=word_break,
+        fit_mm=fit_mm
+    )
+    return img, image_digest(img)
 
-            draw.rectangle((x, y, x+lw_px, y+lh_px), outline="#666666", width=2)
-            ix1, iy1 = x+pl, y+pt
-            ix2, iy2 = x+lw_px-pr, y+lh_px-pb
-            draw.rectangle((ix1, iy1, ix2, iy2), outline="#cccccc", width=1)
+@st.cache_data(max_entries=64)
+def cached_png(digest, _img):
+    return pil_to_bytes(_img)
 
-            px = ix1 + ((ix2 - ix1 - li.width)//2)
-            py = iy1 + ((iy2 - iy1 - li.height)//2)
-            preview.paste(li, (px, py))
+@st.cache_data(max_entries=256)
+def cached_auto_fit(digest, _img, paper_mm, margins, spacing_mm, orientation):
+    return compute_label_mm_from_composed(_img, paper_mm, margins, spacing_mm, orientation)
 
-    return preview, cols, rows
+@st.cache_data(max_entries=64)
+def cached_preview_png(digest, _img, label_mm, paper_mm, margins, spacing_mm, padding, orientation, page_landscape):
+    preview_img, cols, rows = generate_pdf_preview(
+        _img,
+        label_mm,
+        paper_mm,
+        margins,
+        spacing_mm,
+        padding,
+        orientation,
+        max_px=900,
+        page_landscape=page_landscape,
+        mode=_img.mode
+    )
+    return pil_to_bytes(preview_img), cols, rows
 
 # ============================================================
 # UI SIDEBAR
@@ -305,12 +94,35 @@ def generate_pdf_preview(label_img, label_mm, paper_mm, margins_mm, spacing_mm,
 st.sidebar.header("Controls")
 code_input = st.sidebar.text_input("Input Kode:", "")
 description_value = st.sidebar.text_area("Description:", "")
-barcode_type = st.sidebar.selectbox("Jenis Barcode:", ["Code128","QR"])
+barcode_type = st.sidebar.selectbox("Jenis Barcode:", SYMBOLOGIES)
 
 with st.sidebar.expander("Description Settings", True):
     desc_position = st.selectbox("Posisi Description", ["Bottom","Right"])
     desc_font_size = st.slider("Font size", 8, 72, 14)
+    fit_font = st.checkbox(
+        "Kecilkan font agar muat di label",
+        help="Font size menjadi ukuran maksimum; barcode tetap sebesar mungkin. Tidak berlaku untuk Auto-fit."
+    )
     spacing_barcode_to_description = st.slider("Spacing barcode → desc", -50, 50, 5)
+    word_break_choice = st.selectbox(
+        "Kata terlalu panjang",
+        ["Potong per huruf", "Potong dengan tanda -", "Singkat dengan ...", "Biarkan (label melebar)"],
+        help="Untuk nomor part atau URL yang lebih lebar dari barcode"
+    )
+    word_break = {
+        "Potong per huruf": "char",
+        "Potong dengan tanda -": "hyphen",
+        "Singkat dengan ...": "ellipsis",
+    }.get(word_break_choice, "none")
+
+with st.sidebar.expander("Warna / Printer Thermal"):
+    color_choice = st.radio("Mode warna:", ["RGB", "Grayscale", "Monokrom 1-bit (thermal)"])
+    color_mode = {"RGB": "RGB", "Grayscale": "L"}.get(color_choice, "1")
+    mono_threshold = st.slider(
+        "Threshold hitam/putih", 1, 255, MONO_THRESHOLD,
+        disabled=color_mode != "1",
+        help="Piksel lebih gelap dari nilai ini dicetak hitam (tanpa dithering)"
+    )
 
 generate_btn = st.sidebar.button("Generate & Compose Label",type ="primary")
 
@@ -347,22 +159,40 @@ with st.sidebar.expander("Page Margin & Padding"):
     "Setting Jarak Antara Label"
     spacing_mm = st.number_input("Spacing antar label", value=1.0)
 
+# Fitting the font needs a known label size, so Auto-fit labels keep theirs
+fit_active = fit_font and label_mode != "Auto-fit"
+fit_mm = cell_inner_mm(
+    label_mm, {"top": pad_top, "bottom": pad_bottom, "left": pad_left, "right": pad_right}, label_orientation
+) if fit_active else None
+
 # ============================================================
 # GENERATE LABEL
 # ============================================================
+render_t0 = time.perf_counter()
 if generate_btn:
     if not code_input.strip():
         st.sidebar.error("Masukkan kode terlebih dahulu!")
     else:
-        raw_bc = generate_qr(code_input) if barcode_type=="QR" else generate_code128(code_input)
-        composed = compose_label_image_wrapped(
-            raw_bc.convert("RGB"),
+        composed, digest = cached_render_label(
+            code_input,
             description_value,
-            spacing_px=spacing_barcode_to_description,
-            font_size=desc_font_size,
-            position=desc_position
+            barcode_type,
+            spacing_barcode_to_description,
+            desc_font_size,
+            desc_position,
+            color_mode,
+            mono_threshold,
+            word_break,
+            fit_mm
         )
         st.session_state["label_img"] = composed
+        st.session_state["label_digest"] = digest
+        st.session_state["label_item"] = {
+            "code": code_input,
+            "description": description_value,
+            "symbology": barcode_type,
+            "quantity": 1,
+        }
         st.success("Label berhasil dibuat!")
 
 # ============================================================
@@ -372,7 +202,7 @@ col1, col2 = st.columns(2)
 with col1:
     st.subheader("Composed Label")
     if "label_img" in st.session_state:
-        st.image(pil_to_bytes(st.session_state["label_img"]))
+        st.image(cached_png(st.session_state["label_digest"], st.session_state["label_img"]))
     else:
         st.info("Belum ada label.")
 
@@ -383,12 +213,16 @@ with col2:
         padding = {"top": pad_top, "bottom": pad_bottom, "left": pad_left, "right": pad_right}
 
         if label_mode=="Auto-fit":
-            label_mm_use = compute_label_mm_from_composed(st.session_state["label_img"], paper_mm, margins, spacing_mm, label_orientation)
+            label_mm_use = cached_auto_fit(
+                st.session_state["label_digest"], st.session_state["label_img"],
+                paper_mm, margins, spacing_mm, label_orientation
+            )
             st.caption(f"Auto-fit size: {label_mm_use[0]} × {label_mm_use[1]} mm")
         else:
             label_mm_use = label_mm
 
-        preview_img, cols, rows = generate_pdf_preview(
+        preview_png, cols, rows = cached_preview_png(
+            st.session_state["label_digest"],
             st.session_state["label_img"],
             label_mm_use,
             paper_mm,
@@ -396,11 +230,11 @@ with col2:
             spacing_mm,
             padding,
             label_orientation,
-            max_px=900,
-            page_landscape=page_landscape
+            page_landscape
         )
-        st.image(pil_to_bytes(preview_img),
+        st.image(preview_png,
                  caption=f"{cols} kolom × {rows} baris = {cols*rows} label")
+        st.caption(f"Render gambar: {(time.perf_counter() - render_t0) * 1000:.1f} ms")
     else:
         st.info("Generate label dulu.")
 
@@ -408,6 +242,12 @@ with col2:
 # GENERATE PDF
 # ============================================================
 st.sidebar.subheader("Generate PDF")
+vector_pdf = st.sidebar.checkbox("PDF vektor (barcode & teks tajam, file kecil)")
+exact_dpi = st.sidebar.checkbox(
+    "Raster sesuai DPI printer (tanpa resampling)", disabled=vector_pdf,
+    help="Label dirender sekali pada resolusi printer, lebar modul barcode bulat dalam dot"
+)
+pdf_dpi = st.sidebar.selectbox("DPI raster", PRINTER_DPIS, disabled=not exact_dpi or vector_pdf)
 generate_pdf_btn = st.sidebar.button("Generate PDF", type="primary")
 
 if generate_pdf_btn and "label_img" in st.session_state:
@@ -415,26 +255,74 @@ if generate_pdf_btn and "label_img" in st.session_state:
     padding = {"top": pad_top, "bottom": pad_bottom, "left": pad_left, "right": pad_right}
 
     if label_mode=="Auto-fit":
-        label_mm_use = compute_label_mm_from_composed(
-            st.session_state["label_img"], paper_mm, margins, spacing_mm, label_orientation
+        label_mm_use = cached_auto_fit(
+            st.session_state["label_digest"], st.session_state["label_img"],
+            paper_mm, margins, spacing_mm, label_orientation
         )
     else:
         label_mm_use = label_mm
 
-    pdf_buf = generate_pdf(
-        st.session_state["label_img"],
-        label_mm_use,
-        paper_mm,
-        margins,
-        spacing_mm,
-        padding,
-        label_orientation,
-        page_landscape
-    )
-
+    if vector_pdf and "label_item" in st.session_state:
+        _, _, cells = compute_page_grid_pt(
+            label_mm_use, paper_mm, margins, spacing_mm, label_orientation, page_landscape
+        )
+        pdf_buf, _, _ = generate_pdf_vector(
+            [dict(st.session_state["label_item"], quantity=len(cells))],
+            label_mm_use,
+            paper_mm,
+            margins,
+            spacing_mm,
+            padding,
+            label_orientation,
+            page_landscape,
+            spacing_px=spacing_barcode_to_description,
+            font_size=desc_font_size,
+            position=desc_position,
+            word_break=word_break,
+            fit_font=fit_active
+        )
+    elif exact_dpi and "label_item" in st.session_state:
+        # Padding is drawn into the bitmap, which then fills its cell 1:1
+        item = st.session_state["label_item"]
+        cell_mm = label_mm_use[::-1] if label_orientation=="Landscape" else label_mm_use
+        bitmap = render_label_bitmap(
+            item["code"],
+            item["description"],
+            cell_mm,
+            item["symbology"],
+            spacing_px=spacing_barcode_to_description,
+            font_size=desc_font_size,
+            position=desc_position,
+            padding_mm=padding,
+            dpi=pdf_dpi,
+            mode=color_mode,
+            threshold=mono_threshold,
+            word_break=word_break,
+            fit_font=fit_active
+        )
+        pdf_buf = generate_pdf(
+            bitmap,
+            label_mm_use,
+            paper_mm,
+            margins,
+            spacing_mm,
+            dict.fromkeys(padding, 0.0),
+            label_orientation,
+            page_landscape
+        )
+    else:
+        pdf_buf = generate_pdf(
+            st.session_state["label_img"],
+            label_mm_use,
+            paper_mm,
+            margins,
+            spacing_mm,
+            padding,
+            label_orientation,
+            page_landscape
+        )
     pdf_bytes = pdf_buf.getvalue()
 
-
     # Tombol download PDF
     st.download_button(
         "Download PDF",
@@ -443,9 +331,146 @@ if generate_pdf_btn and "label_img" in st.session_state:
         mime="application/pdf"
     )
 
+# ============================================================
+# PRINTER OUTPUT (ZPL / TSPL / EPL)
+# ============================================================
+with st.sidebar.expander("Printer Thermal (ZPL / TSPL / EPL)"):
+    printer_lang = st.selectbox("Bahasa printer", list(PRINTER_LANGUAGES.keys()))
+    printer_dpi = st.selectbox("DPI printer", PRINTER_DPIS)
+    printer_gap = st.number_input("Gap antar label (mm)", 0.0, value=2.0)
+    printer_qty = st.number_input("Jumlah cetak", 1, value=1)
+    if "label_item" in st.session_state:
+        margins = {"top": m_top, "bottom": m_bottom, "left": m_left, "right": m_right}
+        padding = {"top": pad_top, "bottom": pad_bottom, "left": pad_left, "right": pad_right}
+        if label_mode=="Auto-fit":
+            label_mm_use = cached_auto_fit(
+                st.session_state["label_digest"], st.session_state["label_img"],
+                paper_mm, margins, spacing_mm, label_orientation
+            )
+        else:
+            label_mm_use = label_mm
+        item = st.session_state["label_item"]
+        commands = render_printer_label(
+            printer_lang,
+            item["code"],
+            item["description"],
+            label_mm_use,
+            item["symbology"],
+            spacing_px=spacing_barcode_to_description,
+            font_size=desc_font_size,
+            position=desc_position,
+            padding_mm=padding,
+            dpi=printer_dpi,
+            quantity=printer_qty,
+            gap_mm=printer_gap,
+            word_break=word_break,
+            fit_font=fit_active
+        )
+        ext = PRINTER_LANGUAGES[printer_lang].extension
+        st.download_button(
+            f"Download {printer_lang}",
+            data=commands,
+            file_name=f"{item['code']}.{ext}",
+            mime="text/plain"
+        )
+    else:
+        st.info("Generate label dulu.")
+
+# ============================================================
+# BATCH PDF (CSV / XLSX)
+# ============================================================
+with st.sidebar.expander("Batch (CSV / XLSX)"):
+    "Kolom: code, description, symbology, quantity (opsional: label, mis. 13x38)"
+    batch_file = st.file_uploader("File batch", type=["csv", "xlsx"])
+    batch_workers = st.number_input("Worker proses", 1, os.cpu_count() or 1, min(4, os.cpu_count() or 1))
+    batch_pack = st.checkbox(
+        "Campur ukuran label (packing)",
+        help="Tiap baris memakai ukuran di kolom 'label' (atau ukuran label di atas) dan disusun rapat agar halaman sesedikit mungkin"
+    )
+    generate_batch_btn = st.button("Generate Batch PDF", disabled=batch_file is None)
 
+if generate_batch_btn and batch_file is not None:
+    margins = {"top": m_top, "bottom": m_bottom, "left": m_left, "right": m_right}
+    padding = {"top": pad_top, "bottom": pad_bottom, "left": pad_left, "right": pad_right}
 
+    try:
+        header, rows = read_batch_table(batch_file.getvalue(), batch_file.name)
+        items, errors = parse_batch_rows(header, rows, barcode_type)
+    except Exception as e:
+        items, errors = [], [(0, str(e))]
+
+    for line, msg in errors[:20]:
+        st.sidebar.warning(f"Baris {line}: {msg}")
+    if len(errors) > 20:
+        st.sidebar.warning(f"... dan {len(errors) - 20} baris lain dilewati")
+
+    if items:
+        total = sum(it["quantity"] for it in items)
+        progress = st.sidebar.progress(0.0, text=f"0 / {total} label")
+        t0 = time.perf_counter()
+
+        def tracked(labels):
+            for i, img in enumerate(labels, start=1):
+                if i % 100 == 0 or i == total:
+                    progress.progress(i / total, text=f"{i} / {total} label")
+                yield img
+
+        compose_kwargs = dict(
+            spacing_px=spacing_barcode_to_description,
+            font_size=desc_font_size,
+            position=desc_position,
+            word_break=word_break
+        )
+        raster_kwargs = dict(mode=color_mode, threshold=mono_threshold)
+        if label_mode=="Auto-fit":
+            first = render_label(items[0]["code"], items[0]["description"], items[0]["symbology"], **compose_kwargs, **raster_kwargs)
+            label_mm_use = compute_label_mm_from_composed(first, paper_mm, margins, spacing_mm, label_orientation)
+        else:
+            label_mm_use = label_mm
 
+        layout_args = (label_mm_use, paper_mm, margins, spacing_mm, padding, label_orientation, page_landscape)
+        if exact_dpi and not vector_pdf and not batch_pack:
+            cell_mm = label_mm_use[::-1] if label_orientation=="Landscape" else label_mm_use
+            raster_kwargs.update(dpi=pdf_dpi, label_mm=cell_mm, padding_mm=padding)
+            layout_args = (label_mm_use, paper_mm, margins, spacing_mm, dict.fromkeys(padding, 0.0), label_orientation, page_landscape)
+        if batch_pack:
+            owners, sizes = plan_sized_labels(
+                items,
+                None if label_mode=="Auto-fit" else label_mm,
+                lambda img: compute_label_mm_from_composed(img, paper_mm, margins, spacing_mm, label_orientation),
+                label_orientation,
+                workers=batch_workers,
+                **compose_kwargs,
+                **raster_kwargs
+            )
+            def packed_labels(order):
+                return tracked(iter_owned_labels(
+                    items, [owners[i] for i in order], workers=batch_workers, encode=True, **compose_kwargs, **raster_kwargs
+                ))
+            pdf_buf, n_labels, n_pages = generate_pdf_packed(
+                sizes, packed_labels, paper_mm, margins, spacing_mm, padding, page_landscape
+            )
+        elif vector_pdf:
+            pdf_buf, n_labels, n_pages = generate_pdf_vector(items, *layout_args, **compose_kwargs, fit_font=fit_active)
+            progress.progress(1.0, text=f"{n_labels} / {total} label")
+        else:
+            pdf_buf, n_labels, n_pages = generate_pdf_batch(
+                tracked(iter_batch_labels(items, workers=batch_workers, **compose_kwargs, **raster_kwargs, fit_mm=fit_mm, encode=True)), *layout_args
+            )
+        pdf_bytes = pdf_buf.getvalue()
+        elapsed = time.perf_counter() - t0
+        xobjects = pdf_xobject_counts(pdf_bytes)
+        st.sidebar.caption(
+            f"{n_labels} label, {n_pages} halaman dalam {elapsed:.2f} s "
+            f"({n_labels / max(elapsed, 1e-9):.0f} label/s) — "
+            f"{xobjects['forms']} label unik, {xobjects['images']} gambar tertanam"
+        )
+        st.sidebar.download_button(
+            "Download Batch PDF",
+            data=pdf_bytes,
+            file_name=batch_file.name.rsplit(".", 1)[0] + ".pdf",
+            mime="application/pdf"
+        )
 
 # Tambahkan ini di paling bawah sidebar
 st.sidebar.markdown(